@@ -1,7 +1,9 @@
 # agents/templates.py
 # Agent templates and configurations for different conversation modes
 
-from typing import Dict, List, Any
+import functools
+import sys
+from typing import Dict, List, Any, Tuple
 from enum import Enum
 
 VOICE_TAG_GUIDE = """
@@ -55,9 +57,33 @@ Conversation rules:
 """
 
 
+class PromptModule:
+    """Named block of static prompt text shared between agents"""
 
-sarah_system_prompt = f"""
-You are Sarah Chen, a friendly UX designer who loves helping people create better user experiences.
+    __slots__ = ("name", "text")
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+
+
+VOICE_TAG_GUIDE_MODULE = PromptModule("voice_tag_guide", VOICE_TAG_GUIDE)
+CONVERSATION_STYLE_MODULE = PromptModule("conversation_style", CONVERSATION_STYLE)
+
+JURY_PROMPT_MODULES: Tuple[PromptModule, ...] = (VOICE_TAG_GUIDE_MODULE, CONVERSATION_STYLE_MODULE)
+ENVIRONMENT_PROMPT_MODULES: Tuple[PromptModule, ...] = (VOICE_TAG_GUIDE_MODULE,)
+
+
+def build_system_prompt(modules: Tuple[PromptModule, ...], identity: str) -> str:
+    """Compose a system prompt from shared modules followed by the agent-specific part.
+
+    Every system prompt starts with the shared static modules and ends with the
+    agent-specific part, so consecutive requests share the longest possible
+    identical prefix and OpenAI's automatic prompt caching can reuse it.
+    """
+    return "\n".join((*(module.text for module in modules), identity))
+
+sarah_identity = """You are Sarah Chen, a friendly UX designer who loves helping people create better user experiences.
 
 Personality: Warm, encouraging, curious. 
 Identity: "Sarah" or "Sarah Chen."
@@ -67,10 +93,6 @@ Focus areas:
 - Making things easy and enjoyable
 - Who will use this product and why
 
-{VOICE_TAG_GUIDE}
-
-{CONVERSATION_STYLE}
-
 Voice Tag Preferences:
 - Frequently use [curious], [excited], [thoughtful]
 - Sometimes use [pause] or [speaking softly] for empathy
@@ -78,10 +100,11 @@ Voice Tag Preferences:
 - Never use accents unless explicitly asked
 """
 
+sarah_system_prompt = build_system_prompt(JURY_PROMPT_MODULES, sarah_identity)
+
 
 
-alex_system_prompt = f"""
-You are Alex Thompson, a practical software developer who helps people build things that actually work.
+alex_identity = """You are Alex Thompson, a practical software developer who helps people build things that actually work.
 
 Personality: Helpful, down-to-earth, practical.
 Identity: "Alex" or "Alex Thompson."
@@ -91,10 +114,6 @@ Focus areas:
 - Tools and technology choices
 - Ensuring things work reliably
 
-{VOICE_TAG_GUIDE}
-
-{CONVERSATION_STYLE}
-
 Voice Tag Preferences:
 - Commonly use [thoughtful], [clears throat], [curious]
 - Occasionally use [pause] or [rushed] (when explaining something technical)
@@ -102,9 +121,10 @@ Voice Tag Preferences:
 - Avoid overly dramatic tones unless context demands it
 """
 
+alex_system_prompt = build_system_prompt(JURY_PROMPT_MODULES, alex_identity)
+
 
-marcus_system_prompt = f"""
-You are Marcus Rodriguez, a friendly business-minded person who helps people think through the practical side of their ideas.
+marcus_identity = """You are Marcus Rodriguez, a friendly business-minded person who helps people think through the practical side of their ideas.
 
 Personality: Encouraging, pragmatic, supportive.
 Identity: "Marcus" or "Marcus Rodriguez."
@@ -114,10 +134,6 @@ Focus areas:
 - How to reach and attract people
 - Whether it could work as a business
 
-{VOICE_TAG_GUIDE}
-
-{CONVERSATION_STYLE}
-
 Voice Tag Preferences:
 - Use [confident], [excited], [happy], [dramatic tone]
 - Occasionally use [pause] when reflecting
@@ -125,17 +141,54 @@ Voice Tag Preferences:
 - Avoid accents or theatrical effects unless explicitly requested
 """
 
+marcus_system_prompt = build_system_prompt(JURY_PROMPT_MODULES, marcus_identity)
+
+max_identity = """You are Max, a friendly high school student. You love talking about
+                    technology, games, and school projects. You're curious and ask lots of questions.
+                    Keep your language casual and age-appropriate. React naturally to what others say
+                    and ask follow-up questions. Sometimes share your own experiences."""
+max_system_prompt = build_system_prompt(ENVIRONMENT_PROMPT_MODULES, max_identity)
+
+luna_identity = """You are Luna, an enthusiastic high school student who loves
+                    learning languages and meeting new people. You're supportive and encouraging.
+                    Ask about the user's interests and share related experiences. Keep conversations
+                    flowing naturally and be genuinely interested in the user's responses."""
+luna_system_prompt = build_system_prompt(ENVIRONMENT_PROMPT_MODULES, luna_identity)
+
+jordan_identity = """You are Jordan, a creative high school student interested in
+                    art, music, and creative projects. You ask thoughtful questions and encourage
+                    creative thinking. Build on the conversation naturally and show genuine
+                    curiosity about the user's creative side."""
+jordan_system_prompt = build_system_prompt(ENVIRONMENT_PROMPT_MODULES, jordan_identity)
+
+david_identity = """You are David Kim, a professional project manager. You're
+                    experienced and helpful, always looking to mentor others. Ask about work
+                    approaches, project management, and professional development. Keep the tone
+                    professional but friendly."""
+david_system_prompt = build_system_prompt(ENVIRONMENT_PROMPT_MODULES, david_identity)
+
+maria_identity = """You are Maria Garcia, a marketing professional who loves
+                    brainstorming and creative problem-solving. You ask insightful questions
+                    about communication, branding, and audience engagement. Be collaborative
+                    and build on ideas together."""
+maria_system_prompt = build_system_prompt(ENVIRONMENT_PROMPT_MODULES, maria_identity)
+
 ## ============================================================================
 
 class AgentTemplate:
     """Base template for conversation agents"""
 
+    __slots__ = ("name", "system_prompt", "persona", "gender", "voice_id", "valid_name")
+
     def __init__(self, name: str, system_prompt: str, persona: str, gender: str, voice_id: str):
-        self.name = name
+        # Intern the short identifiers used as lookup keys downstream (names, voice IDs)
+        self.name = sys.intern(name)
         self.system_prompt = system_prompt
-        self.persona = persona
-        self.gender = gender
-        self.voice_id = voice_id
+        self.persona = sys.intern(persona)
+        self.gender = sys.intern(gender)
+        self.voice_id = sys.intern(voice_id)
+        # Name as a valid Python identifier, as required for Autogen agent names
+        self.valid_name = sys.intern(name.replace(" ", "_").replace("-", "_").lower())
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -146,99 +199,91 @@ class AgentTemplate:
             "voice_id": self.voice_id
         }
 
+# Templates are static config, so build them once at import and share them across sessions
+_JURY_TEMPLATES: Tuple[AgentTemplate, ...] = (
+    AgentTemplate(
+        name="Sarah Chen",
+        system_prompt=sarah_system_prompt,
+        persona="ux_specialist",
+        gender="female",
+        voice_id="v3V1d2rk6528UrLKRuy8"
+    ),
+    AgentTemplate(
+        name="Alex Thompson",
+        system_prompt=alex_system_prompt,
+        persona="technical_expert",
+        gender="male",
+        voice_id="5Q0t7uMcjvnagumLfvZi"
+    ),
+    AgentTemplate(
+        name="Marcus Rodriguez",
+        system_prompt=marcus_system_prompt,
+        persona="business_analyst",
+        gender="male",
+        voice_id="D38z5RcWu1voky8WS1ja"
+    )
+)
+
+_ENV_TEMPLATES: Dict[str, Tuple[AgentTemplate, ...]] = {
+    "school": (
+        AgentTemplate(
+            name="Max",
+            system_prompt=max_system_prompt,
+            persona="student_tech",
+            gender="male",
+            voice_id="TxGEqnHWrfWFTfGW9XjX"
+        ),
+        AgentTemplate(
+            name="Luna",
+            system_prompt=luna_system_prompt,
+            persona="student_social",
+            gender="female",
+            voice_id="EXAVITQu4vr4xnSDxMaL"
+        ),
+        AgentTemplate(
+            name="Jordan",
+            system_prompt=jordan_system_prompt,
+            persona="student_creative",
+            gender="neutral",
+            voice_id="MF3mGyEYCl7XYWbV9V6O"
+        )
+    ),
+    "office": (
+        AgentTemplate(
+            name="David Kim",
+            system_prompt=david_system_prompt,
+            persona="professional_mentor",
+            gender="male",
+            voice_id="pNInz6obpgDQGcFmaJgB"
+        ),
+        AgentTemplate(
+            name="Maria Garcia",
+            system_prompt=maria_system_prompt,
+            persona="marketing_creative",
+            gender="female",
+            voice_id="MF3mGyEYCl7XYWbV9V6O"
+        )
+    )
+}
+
+@functools.lru_cache(maxsize=8)
+def _environment_templates(environment_type: str) -> Tuple[AgentTemplate, ...]:
+    """Resolve an environment type to its shared template tuple"""
+    # Default to school environment
+    return _ENV_TEMPLATES.get(environment_type, _ENV_TEMPLATES["school"])
+
 class ConversationTemplates:
     """Templates for different conversation modes"""
 
     @staticmethod
-    def get_presentation_jury_mode() -> List[AgentTemplate]:
+    def get_presentation_jury_mode() -> Tuple[AgentTemplate, ...]:
         """Jury evaluation mode for presentation feedback - individual expert agents"""
-        return [
-            AgentTemplate(
-                name="Sarah Chen",
-                system_prompt=sarah_system_prompt,
-                persona="ux_specialist",
-                gender="female",
-                voice_id="v3V1d2rk6528UrLKRuy8"
-            ),
-            AgentTemplate(
-                name="Alex Thompson",
-                system_prompt=alex_system_prompt,
-                persona="technical_expert",
-                gender="male",
-                voice_id="5Q0t7uMcjvnagumLfvZi"
-            ),
-            AgentTemplate(
-                name="Marcus Rodriguez",
-                system_prompt=marcus_system_prompt,
-                persona="business_analyst",
-                gender="male",
-                voice_id="D38z5RcWu1voky8WS1ja"
-            )
-        ]
+        return _JURY_TEMPLATES
 
     @staticmethod
-    def get_environment_mode(environment_type: str = "school") -> List[AgentTemplate]:
+    def get_environment_mode(environment_type: str = "school") -> Tuple[AgentTemplate, ...]:
         """Casual conversation mode with environmental context"""
-        if environment_type == "school":
-            return [
-                AgentTemplate(
-                    name="Max",
-                    system_prompt=f"""You are Max, a friendly high school student. You love talking about
-                    technology, games, and school projects. You're curious and ask lots of questions.
-                    Keep your language casual and age-appropriate. React naturally to what others say
-                    and ask follow-up questions. Sometimes share your own experiences. {VOICE_TAG_GUIDE}""",
-                    persona="student_tech",
-                    gender="male",
-                    voice_id="TxGEqnHWrfWFTfGW9XjX"
-                ),
-                AgentTemplate(
-                    name="Luna",
-                    system_prompt=f"""You are Luna, an enthusiastic high school student who loves
-                    learning languages and meeting new people. You're supportive and encouraging.
-                    Ask about the user's interests and share related experiences. Keep conversations
-                    flowing naturally and be genuinely interested in the user's responses. {VOICE_TAG_GUIDE}""",
-                    persona="student_social",
-                    gender="female",
-                    voice_id="EXAVITQu4vr4xnSDxMaL"
-                ),
-                AgentTemplate(
-                    name="Jordan",
-                    system_prompt=f"""You are Jordan, a creative high school student interested in
-                    art, music, and creative projects. You ask thoughtful questions and encourage
-                    creative thinking. Build on the conversation naturally and show genuine
-                    curiosity about the user's creative side. {VOICE_TAG_GUIDE}""",
-                    persona="student_creative",
-                    gender="neutral",
-                    voice_id="MF3mGyEYCl7XYWbV9V6O"
-                )
-            ]
-
-        elif environment_type == "office":
-            return [
-                AgentTemplate(
-                    name="David Kim",
-                    system_prompt=f"""You are David Kim, a professional project manager. You're
-                    experienced and helpful, always looking to mentor others. Ask about work
-                    approaches, project management, and professional development. Keep the tone
-                    professional but friendly. {VOICE_TAG_GUIDE}""",
-                    persona="professional_mentor",
-                    gender="male",
-                    voice_id="pNInz6obpgDQGcFmaJgB"
-                ),
-                AgentTemplate(
-                    name="Maria Garcia",
-                    system_prompt=f"""You are Maria Garcia, a marketing professional who loves
-                    brainstorming and creative problem-solving. You ask insightful questions
-                    about communication, branding, and audience engagement. Be collaborative
-                    and build on ideas together. {VOICE_TAG_GUIDE}""",
-                    persona="marketing_creative",
-                    gender="female",
-                    voice_id="MF3mGyEYCl7XYWbV9V6O"
-                )
-            ]
-
-        # Default to school environment
-        return ConversationTemplates.get_environment_mode("school")
+        return _environment_templates(environment_type)
 
     @staticmethod
     def get_background_audio_enabled(mode: str) -> bool:
@@ -1,47 +1,163 @@
 # app.py
 # Main FastAPI application for Clarity - AI conversational learning app
 
+import asyncio
+import logging
 import os
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Union
+from weakref import WeakValueDictionary
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+import orjson
 import uvicorn
 from dotenv import load_dotenv
 
-from models.schema import (
-    SessionRequest, MessageRequest,
-    SessionResponse, ConversationMode
-)
+from models.schema import SessionRequest, SessionResponse, MessageRequest
 from services.autogen_service import AutogenService
 from services.conversation_service import ConversationService
 
 # Load environment variables
 load_dotenv()
 
+# Root log level (set LOG_LEVEL=DEBUG to trace agent turns)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Sweep idle sessions from both services while the app is running"""
+    sweepers = [
+        asyncio.create_task(autogen_service.sessions.run_sweeper()),
+        asyncio.create_task(conversation_service.sessions.run_sweeper()),
+    ]
+    yield
+    for sweeper in sweepers:
+        sweeper.cancel()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Clarity API",
     description="AI conversational learning app with multi-agent interactions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
+# Add CORS middleware with an explicit allowlist (comma-separated CORS_ORIGINS, defaults to the Vite dev server)
+cors_origins = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
+    if origin.strip()
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type", "authorization"],
 )
 
 # Initialize services
 autogen_service = AutogenService()  # For jury mode
 conversation_service = ConversationService()  # For environment/conversation mode
 
-# Store active WebSocket connections
-active_connections: Dict[str, WebSocket] = {}
+# Which service owns each session, so WebSocket messages need a single lookup;
+# entries are dropped when the owning service's cache removes the session
+session_services: Dict[str, Union[AutogenService, ConversationService]] = {}
+
+
+def _forget_session(session_id: str):
+    session_services.pop(session_id, None)
+
+
+autogen_service.sessions.on_remove = _forget_session
+conversation_service.sessions.on_remove = _forget_session
+
+# Store active WebSocket connections; weak values so dropped sockets don't linger
+active_connections: "WeakValueDictionary[str, WebSocket]" = WeakValueDictionary()
+
+
+# Static parts of frequently sent payloads; only the timestamp is filled in per message
+_ACK_PAYLOAD = {"type": "message_received", "content": "Processing your message..."}
+_PONG_PAYLOAD = {"type": "pong"}
+_HEALTH_PAYLOAD = {"status": "healthy", "service": "Clarity API", "version": "1.0.0"}
+
+
+def _timestamped(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a static payload and stamp it with the current time"""
+    message = payload.copy()
+    message["timestamp"] = datetime.now().isoformat()
+    return message
+
+
+async def _send(websocket: WebSocket, payload: Union[Dict[str, Any], List[Dict[str, Any]]]):
+    """Send a JSON payload over the WebSocket, encoded with orjson"""
+    # Keep text frames: the frontend parses messages with JSON.parse(event.data)
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
+# Responses arriving within this window are coalesced into one frame
+_BATCH_MAX_SIZE = 8
+_BATCH_WINDOW_SECONDS = 0.01
+
+# Marks the end of the responses a producer task forwards
+_BATCH_END = object()
+
+
+async def _send_batched(websocket: WebSocket, responses: AsyncIterator[Dict[str, Any]]) -> int:
+    """Forward responses to the client, sending those that arrive close together as one JSON array frame"""
+    sent = 0
+    batch: List[Dict[str, Any]] = []
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        # The whole generator runs in this one task, so context managers inside it
+        # (e.g. tracing spans) enter and exit in the same Context
+        try:
+            async for response in responses:
+                queue.put_nowait(response)
+        finally:
+            queue.put_nowait(_BATCH_END)
+
+    async def flush():
+        nonlocal sent, batch
+        # A lone response goes out as a plain object, several as an array
+        await _send(websocket, batch[0] if len(batch) == 1 else batch)
+        sent += len(batch)
+        batch = []
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                if batch:
+                    item = await asyncio.wait_for(queue.get(), _BATCH_WINDOW_SECONDS)
+                else:
+                    item = await queue.get()
+            except asyncio.TimeoutError:
+                await flush()
+                continue
+            if item is _BATCH_END:
+                break
+            batch.append(item)
+            if len(batch) >= _BATCH_MAX_SIZE:
+                await flush()
+
+        # Deliver what already arrived, then surface the generator's error, if any
+        if batch:
+            await flush()
+        await producer
+    finally:
+        # Stop the generator if sending fails midway
+        producer.cancel()
+
+    return sent
 
 # Audio processing is now handled by frontend using ElevenLabs TypeScript SDK
 
@@ -49,44 +165,50 @@ active_connections: Dict[str, WebSocket] = {}
 async def create_session(request: SessionRequest):
     """Initialize a new conversation session with specified mode"""
     try:
-        print(f"Received session request: {request}")
-        print(f"Mode: {request.mode}, type: {type(request.mode)}")
+        logger.debug("Received session request: %s", request)
 
         # Generate unique session ID
         session_id = str(uuid.uuid4())
 
         # Create conversation session using appropriate service
-        mode_value = request.mode if isinstance(request.mode, str) else request.mode.value
-        print(f"Using mode value: {mode_value}")
+        mode_value = request.mode
 
+        # Building agents is blocking work, so keep it off the event loop; the session is stored
+        # back on the loop, since storing can evict and close other sessions (not thread-safe)
         if mode_value == "presentation-jury-mode":
             # Use original autogen service for jury mode
-            session = autogen_service.create_session(
+            service = autogen_service
+            session = await asyncio.to_thread(
+                autogen_service.build_session,
                 session_id=session_id,
                 mode=mode_value,
                 environment_type=request.environment_type or "school"
             )
         else:
             # Use new conversation service for environment mode
-            session = conversation_service.create_session(
+            service = conversation_service
+            session = await asyncio.to_thread(
+                conversation_service.build_session,
                 session_id=session_id,
                 environment_type=request.environment_type or "school"
             )
 
+        service.sessions.put(session_id, session)
+        session_services[session_id] = service
+
         session_dict = session.to_dict()
-        print(f"Session created: {session_dict}")
+        logger.debug("Session created: %s", session_dict)
 
-        return SessionResponse(
-            session_id=session_id,
-            mode=request.mode,
-            agents=session_dict["agents"],
-            background_audio_enabled=session_dict["background_audio_enabled"]
-        )
+        # Same shape as SessionResponse; a Response is returned as-is, so the fields are not re-validated
+        return ORJSONResponse({
+            "session_id": session_id,
+            "mode": mode_value,
+            "agents": session_dict["agents"],
+            "background_audio_enabled": session_dict["background_audio_enabled"]
+        })
 
     except Exception as e:
-        print(f"Error creating session: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating session")
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 
@@ -141,91 +263,89 @@ async def stream_placeholder():
     }
 
 
+async def _handle_user_message(websocket: WebSocket, session_id: str, data: Dict[str, Any]):
+    """Forward a user message to the session's agents and stream their responses back"""
+    user_message = data.get("content", "")
+    user_name = data.get("user_name", "User")
+    logger.debug("Processing user message: '%s' from %s", user_message, user_name)
+
+    # Send acknowledgment
+    await _send(websocket, _timestamped(_ACK_PAYLOAD))
+    logger.debug("Sent acknowledgment")
+
+    try:
+        # Get agent responses using appropriate service
+        logger.debug("Getting agent responses...")
+        response_count = 0
+
+        # Look up the service that owns this session
+        service = session_services.get(session_id)
+        if service is autogen_service and data.get("stream"):
+            # Clients that opt in get token deltas ahead of each complete agent message
+            response_count = await _send_batched(
+                websocket,
+                service.get_agent_responses(session_id, user_message, user_name, stream=True)
+            )
+        elif service:
+            response_count = await _send_batched(
+                websocket,
+                service.get_agent_responses(session_id, user_message, user_name)
+            )
+        else:
+            logger.warning("Session %s not found in either service", session_id)
+
+        logger.debug("Completed sending %d agent responses", response_count)
+
+    except Exception as agent_error:
+        logger.exception("WebSocket agent error for session %s", session_id)
+
+        # Send error to client
+        await _send(websocket, {
+            "type": "error",
+            "message": f"Agent processing error: {str(agent_error)}",
+            "timestamp": datetime.now().isoformat()
+        })
+
+
+async def _handle_ping(websocket: WebSocket, session_id: str, data: Dict[str, Any]):
+    """Answer a client keep-alive ping"""
+    await _send(websocket, _timestamped(_PONG_PAYLOAD))
+    logger.debug("Responded to ping")
+
+
+# WebSocket message type -> handler
+_HANDLERS: Dict[str, Callable[[WebSocket, str, Dict[str, Any]], Awaitable[None]]] = {
+    "user_message": _handle_user_message,
+    "ping": _handle_ping,
+}
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time conversation streaming"""
-    print(f"WebSocket connection attempt for session: {session_id}")
+    logger.debug("WebSocket connection attempt for session: %s", session_id)
 
     try:
         await websocket.accept()
         active_connections[session_id] = websocket
-        print(f"WebSocket connected for session: {session_id}")
+        logger.debug("WebSocket connected for session: %s", session_id)
 
         while True:
-            # Receive message from client
-            data = await websocket.receive_json()
+            # Receive message from client (sent as text frames by the frontend)
+            data = orjson.loads(await websocket.receive_text())
             message_type = data.get("type")
-            print(f"Received WebSocket message: {message_type}")
-
-            if message_type == "user_message":
-                user_message = data.get("content", "")
-                user_name = data.get("user_name", "User")
-                print(f"Processing user message: '{user_message}' from {user_name}")
-
-                # Send acknowledgment
-                await websocket.send_json({
-                    "type": "message_received",
-                    "content": "Processing your message...",
-                    "timestamp": datetime.now().isoformat()
-                })
-                print("Sent acknowledgment")
-
-                try:
-                    # Get agent responses using appropriate service
-                    print("Getting agent responses...")
-                    response_count = 0
-
-                    # Check if session exists in jury mode service first
-                    jury_session = autogen_service.get_session(session_id)
-                    if jury_session:
-                        print("Using jury mode service")
-                        async for response in autogen_service.get_agent_responses(session_id, user_message, user_name):
-                            response_count += 1
-                            print(f"Sending jury response #{response_count}: {response}")
-                            await websocket.send_json(response)
-                    else:
-                        # Try conversation service
-                        conv_session = conversation_service.get_session(session_id)
-                        if conv_session:
-                            print("Using conversation mode service")
-                            async for response in conversation_service.get_agent_responses(session_id, user_message, user_name):
-                                response_count += 1
-                                print(f"Sending conversation response #{response_count}: {response}")
-                                await websocket.send_json(response)
-                        else:
-                            print(f"Session {session_id} not found in either service")
-
-                    print(f"Completed sending {response_count} agent responses")
-
-                except Exception as agent_error:
-                    print(f"Error getting agent responses: {agent_error}")
-                    import traceback
-                    traceback.print_exc()
-
-                    # Send error to client
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": f"Agent processing error: {str(agent_error)}",
-                        "timestamp": datetime.now().isoformat()
-                    })
-
-            elif message_type == "ping":
-                await websocket.send_json({
-                    "type": "pong",
-                    "timestamp": datetime.now().isoformat()
-                })
-                print("Responded to ping")
+            logger.debug("Received WebSocket message: %s", message_type)
+
+            handler = _HANDLERS.get(message_type)
+            if handler:
+                await handler(websocket, session_id, data)
 
     except WebSocketDisconnect:
-        if session_id in active_connections:
-            del active_connections[session_id]
-        print(f"WebSocket disconnected for session: {session_id}")
-    except Exception as e:
-        print(f"WebSocket error for session {session_id}: {e}")
-        import traceback
-        traceback.print_exc()
-        if session_id in active_connections:
-            del active_connections[session_id]
+        active_connections.pop(session_id, None)
+        logger.debug("WebSocket disconnected for session: %s", session_id)
+    except Exception:
+        logger.exception("WebSocket error for session %s", session_id)
+        active_connections.pop(session_id, None)
 
 
 # Environment audio generation moved to frontend using ElevenLabs TypeScript SDK Sound Effects
@@ -234,30 +354,33 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "service": "Clarity API",
-        "version": "1.0.0"
-    }
+    return _timestamped(_HEALTH_PAYLOAD)
 
 
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {"error": "Endpoint not found", "status_code": 404}
+    return ORJSONResponse({"error": "Endpoint not found", "status_code": 404}, status_code=404)
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
-    return {"error": "Internal server error", "status_code": 500}
+    return ORJSONResponse({"error": "Internal server error", "status_code": 500}, status_code=500)
 
 
 if __name__ == "__main__":
-    # Run the server
+    # Run the server. "auto" picks uvloop/httptools when installed and falls back to asyncio/h11.
+    # Sessions live in process memory, so only raise WORKERS behind a sticky load balancer.
+    workers = int(os.getenv("WORKERS", "1"))
+    reload = os.getenv("RELOAD", "0") == "1"
+    if reload and workers > 1:
+        logger.warning("RELOAD=1 runs a single process; WORKERS=%d is ignored", workers)
     uvicorn.run(
         "app:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="auto",
+        http="auto",
+        workers=workers,
+        reload=reload,
         log_level="info"
     )
\ No newline at end of file
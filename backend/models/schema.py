@@ -2,7 +2,7 @@
 # Pydantic data models and schemas for Clarity API
 
 from pydantic import BaseModel
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 from enum import Enum
 
 class ConversationMode(str, Enum):
@@ -16,9 +16,12 @@ class AgentGender(str, Enum):
     FEMALE = "female"
     NEUTRAL = "neutral"
 
+# Plain string literal of the ConversationMode values - validated without an Enum round-trip
+ConversationModeName = Literal["presentation-jury-mode", "environment"]
+
 class SessionRequest(BaseModel):
     """Request model for starting a new session"""
-    mode: ConversationMode
+    mode: ConversationModeName
     user_name: Optional[str] = "User"
     environment_type: Optional[str] = "school"  # For environment mode
 
@@ -39,7 +42,7 @@ class AgentResponse(BaseModel):
 class SessionResponse(BaseModel):
     """Response model for session creation"""
     session_id: str
-    mode: ConversationMode
+    mode: ConversationModeName
     agents: List[dict]
     background_audio_enabled: bool
 
@@ -2,85 +2,210 @@
 # Autogen multi-agent conversation orchestration service
 
 import asyncio
+import functools
 import json
+import logging
 import os
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import List, Dict, Any, Optional, AsyncGenerator, Deque, Tuple, Union
 from datetime import datetime
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.messages import TextMessage
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import ModelClientStreamingChunkEvent, TextMessage
+from autogen_core.model_context import BufferedChatCompletionContext
+from autogen_core.models import SystemMessage, UserMessage
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from agents.templates import ConversationTemplates, AgentTemplate
+from services.http_pool import openai_slot, shared_http_client
+from services.session_cache import SessionCache
 from dotenv import load_dotenv
 from pathlib import Path
 import openai
+
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 # Clear any existing OPENAI_API_KEY environment variable
 if 'OPENAI_API_KEY' in os.environ:
     del os.environ['OPENAI_API_KEY']
-    print("Cleared existing OPENAI_API_KEY from environment")
+    logger.debug("Cleared existing OPENAI_API_KEY from environment")
 
 # Load .env from the same directory as this file with override=True
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path, override=True)
 
-# Debug: Print the API key (first 20 chars only for security)
+# Debug: Log the tail of the API key only
 api_key = os.getenv("OPENAI_API_KEY")
 if api_key:
-    print(f"API key loaded: {api_key[:20]}...")
-    print(f"API key ends with: ...{api_key[-4:]}")
+    logger.debug("API key loaded, ends with: ...%s", api_key[-4:])
 else:
-    print("WARNING: No API key found!")
+    logger.warning("No API key found!")
+
+SUMMARY_INSTRUCTIONS = "Summarize the following dialogue in 150 tokens, preserving names, decisions, open questions"
+
+# Templates are static; resolve them once at import instead of per session
+_JURY_TEMPLATES = ConversationTemplates.get_presentation_jury_mode()
+
+# Pause the client keeps between consecutive environment-mode agent messages
+ENVIRONMENT_RESPONSE_DELAY_MS = 3000
+
+# Jury task prompts: static instructions come first so the same prefix repeats every
+# turn (and can be served from OpenAI's prompt cache); per-turn data goes after TASK_SEPARATOR
+TASK_SEPARATOR = "\n\n---\n"
+
+JURY_FIRST_QUESTION_INSTRUCTIONS = """This is the start of a presentation evaluation.
+
+Ask your first question as {persona} focused on your expertise. Ask one clear, engaging question."""
+
+JURY_FOLLOWUP_QUESTION_INSTRUCTIONS = """You are part of a presentation evaluation jury.
+
+Ask your question as {persona} focused on your area of expertise. Ask one clear, engaging question that builds on the previous conversation below."""
+
+JURY_THANK_YOU_INSTRUCTIONS = """The user just responded to your question (their response is below).
+
+Acknowledge their response with a brief, natural thank you.
+
+Be brief and natural - just 1-2 sentences maximum."""
+
+JURY_THANK_YOU_TAIL = """The user just responded to your question: "{user_message}"
+
+Examples:
+- "[happy] Thank you for sharing that, {user_name}!"
+- "[thoughtful] Thanks, that's really helpful to know."
+- "[curious] Great, thank you for explaining that!\""""
+
+JURY_CONCLUSION_INSTRUCTIONS = """The user just responded to your question (their response is below).
+
+Thank them for their response and conclude that the evaluation is complete.
+
+Be natural and appreciative."""
+
+JURY_CONCLUSION_TAIL = """The user just responded to your question: "{user_message}"
+
+Example:
+"[thoughtful] Thank you {user_name}! [pause] I think we are done with the questions. [confident] You've shared some really valuable insights about your presentation. [happy] We appreciate you taking the time to practice with us!\""""
+
+# Standing instructions for environment agents; kept in the system prompt so the per-turn
+# messages carry only the conversation itself
+ENVIRONMENT_RESPONSE_RULES = """
+
+As an agent in this conversation, respond naturally based on:
+1. What the user just said
+2. The conversation history
+3. Your personality and role
+4. Build on what others have said
+5. Ask follow-up questions to keep the conversation engaging
+
+Respond naturally and conversationally. Reference previous topics when relevant."""
+
+@functools.lru_cache(maxsize=1)
+def _shared_model_client() -> OpenAIChatCompletionClient:
+    """One model client (and connection pool) shared by every session, built on first use"""
+    return OpenAIChatCompletionClient(
+        model="gpt-4o-mini",
+        #api_key=os.getenv("OPENAI_API_KEY"),
+        api_key=api_key,
+        temperature=0.7,
+        max_tokens=300,  # Slightly longer for detailed jury responses
+        http_client=shared_http_client()
+    )
+
+
+@dataclass(slots=True)
+class ConvoEvent:
+    """One entry of a session's conversation history"""
+    speaker: str
+    message: str
+    ts: datetime
+    type: str
+
+
+@dataclass(slots=True)
+class AgentMessageEvent:
+    """An agent reply streamed to the client (serialized as-is by orjson)"""
+    agent_name: str
+    message: str
+    agent_gender: str
+    voice_id: str
+    timestamp: datetime
+    display_after_ms: Optional[int] = None
+    type: str = "agent_message"
+
+
+@dataclass(slots=True)
+class AgentMessageDelta:
+    """A chunk of an agent reply that is still being generated; the full reply follows as an AgentMessageEvent"""
+    agent_name: str
+    delta: str
+    timestamp: datetime
+    type: str = "agent_message_delta"
+
+
+SessionEvent = Union[AgentMessageEvent, AgentMessageDelta, Dict[str, Any]]
+
+# Marks the end of an agent turn forwarded through a queue
+_STREAM_END = object()
 
 class ConversationSession:
     """Manages a single conversation session with persistent memory"""
 
-    def __init__(self, session_id: str, mode: str, environment_type: str = "school"):
+    def __init__(self, session_id: str, mode: str, model_client: OpenAIChatCompletionClient,
+                 environment_type: str = "school", history_window: int = 20):
         self.session_id = session_id
         self.mode = mode
+        self.model_client = model_client  # Shared across sessions by AutogenService
         self.environment_type = environment_type
+        self.history_window = history_window  # Messages kept in history and in each agent's buffer
         self.agents: List[AssistantAgent] = []
         self.agent_templates: List[AgentTemplate] = []  # Store original templates
         self.agent_name_mapping: Dict[str, str] = {}  # Map internal name to display name
-        self.group_chat: Optional[RoundRobinGroupChat] = None
-        self.conversation_history: List[Dict[str, Any]] = []
+        # Name -> (index, template, agent) lookups, by display name and by internal agent name
+        self._by_display_name: Dict[str, Tuple[int, AgentTemplate, AssistantAgent]] = {}
+        self._by_internal_name: Dict[str, Tuple[int, AgentTemplate, AssistantAgent]] = {}
+        # Jury question tasks rendered up to the per-turn data, per agent
+        self.first_question_prefixes: Dict[str, str] = {}
+        self.followup_question_prefixes: Dict[str, str] = {}
+        self.conversation_history: Deque[ConvoEvent] = deque(maxlen=history_window)
         self.current_speaker_index = 0
 
         # Jury mode specific
         self.current_jury_index = 0
-        self.jury_has_spoken = {}  # Track which jury members have spoken
         self.questions_asked = 0
         self.max_questions = 4
         self.last_agent_who_asked = None  # Track who asked the last question for thank you
 
         # Environment mode specific
         self.conversation_turns = 0
-        self.max_conversation_turns = 20  # Allow longer conversations with memory
+
+        # Older history is folded into a rolling summary instead of capping the conversation
+        self.summary_threshold = 16
+        self.rolling_summary: Optional[str] = None
+        self.summary_pending = False  # Summary not yet shared with the environment agents
+        # Runs after a turn has been sent; its result is picked up at the start of a later turn
+        self._summary_task: Optional["asyncio.Task[Optional[Tuple[str, List[ConvoEvent]]]]"] = None
 
         self.setup_agents()
 
     def setup_agents(self):
         """Initialize agents based on the conversation mode"""
-        # Get model client
-        model_client = OpenAIChatCompletionClient(
-            model="gpt-4o-mini",
-            #api_key=os.getenv("OPENAI_API_KEY"),
-            api_key=api_key,
-            temperature=0.7,
-            max_tokens=300  # Slightly longer for detailed jury responses
-        )
+        model_client = self.model_client
 
         # Get agent templates based on mode
         if self.mode == "presentation-jury-mode":
-            templates = ConversationTemplates.get_presentation_jury_mode()
+            templates = _JURY_TEMPLATES
         else:  # environment mode
             templates = ConversationTemplates.get_environment_mode(self.environment_type)
 
+        # Environment agents get the standing response rules after their persona prompt
+        rules = "" if self.mode == "presentation-jury-mode" else ENVIRONMENT_RESPONSE_RULES
+
         # Create Autogen agents
         for template in templates:
-            # Convert name to valid Python identifier (remove spaces, hyphens, etc.)
-            valid_name = template.name.replace(" ", "_").replace("-", "_").lower()
+            # Identifier form of the name, computed once per template
+            valid_name = template.valid_name
 
             # Store template and name mapping
             self.agent_templates.append(template)
@@ -89,418 +214,457 @@ class ConversationSession:
             agent = AssistantAgent(
                 name=valid_name,
                 model_client=model_client,
-                system_message=template.system_prompt
+                system_message=template.system_prompt + rules,
+                model_context=BufferedChatCompletionContext(buffer_size=self.history_window),
+                model_client_stream=True  # Tokens are only forwarded when a turn asks to stream
             )
             self.agents.append(agent)
 
-            # Initialize jury tracking
+            entry = (len(self.agents) - 1, template, agent)
+            self._by_display_name[template.name] = entry
+            self._by_internal_name[valid_name] = entry
+
+            # Precompute the jury question prefixes
             if self.mode == "presentation-jury-mode":
-                self.jury_has_spoken[template.name] = False
+                self.first_question_prefixes[template.name] = (
+                    JURY_FIRST_QUESTION_INSTRUCTIONS.format(persona=template.persona)
+                    + TASK_SEPARATOR + 'The user said: "'
+                )
+                self.followup_question_prefixes[template.name] = (
+                    JURY_FOLLOWUP_QUESTION_INSTRUCTIONS.format(persona=template.persona)
+                    + TASK_SEPARATOR + "Previous conversation:\n"
+                )
 
-        # Create group chat ONLY for environment mode (not jury mode)
-        if self.mode != "presentation-jury-mode":
-            self.group_chat = RoundRobinGroupChat(participants=self.agents)
+    async def get_agent_response(self, user_message: str, user_name: str = "User",
+                                 stream: bool = False) -> AsyncGenerator[SessionEvent, None]:
+        """Get responses from agents - individual agents for jury mode, concurrent agents for environment mode
 
-    async def get_agent_response(self, user_message: str, user_name: str = "User") -> AsyncGenerator[Dict[str, Any], None]:
-        """Get responses from agents - individual agents for jury mode, group chat for environment mode"""
-        print(f"Getting agent response for: '{user_message}' from {user_name} in {self.mode}")
+        With stream=True, each reply is preceded by agent_message_delta events as its tokens arrive.
+        """
+        logger.debug("Getting agent response for: '%s' from %s in %s", user_message, user_name, self.mode)
+
+        # One timestamp for every event of this turn; orjson encodes it as ISO 8601 when sent
+        turn_ts = datetime.now()
+
+        # Fold in a summary finished since the last turn, without waiting for one still running
+        self._apply_summary()
 
         # Add user message to conversation history
-        self.conversation_history.append({
-            "speaker": user_name,
-            "message": user_message,
-            "timestamp": datetime.now().isoformat(),
-            "type": "user"
-        })
-        print(f"Added user message to history. Total messages: {len(self.conversation_history)}")
+        self.conversation_history.append(ConvoEvent(user_name, user_message, turn_ts, "user"))
+        logger.debug("Added user message to history. Total messages: %s", len(self.conversation_history))
 
         try:
             if self.mode == "presentation-jury-mode":
                 # Individual jury member responses
-                async for response in self._get_jury_response(user_message, user_name):
+                async for response in self._get_jury_response(user_message, user_name, turn_ts, stream):
                     yield response
             else:
-                # Group chat for environment mode
-                async for response in self._get_environment_response(user_message, user_name):
+                # Concurrent agent responses for environment mode
+                async for response in self._get_environment_response(user_message, user_name, turn_ts, stream):
                     yield response
 
         except Exception as e:
-            print(f"Error getting agent response: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting agent response")
             yield {
                 "type": "error",
                 "message": f"Sorry, there was an error processing your message: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
 
+        # Summarize once this turn's replies are out, so the extra request never delays them
+        self._start_summary()
+
     def get_agent_template_by_name(self, name: str) -> Optional[AgentTemplate]:
         """Get agent template by internal agent name"""
-        # First try to get display name from mapping
-        display_name = self.agent_name_mapping.get(name, name)
-
-        # Search templates by display name
-        for template in self.agent_templates:
-            if template.name == display_name:
-                return template
-        return None
+        # Internal names first, falling back to display names
+        entry = self._by_internal_name.get(name) or self._by_display_name.get(name)
+        return entry[1] if entry else None
 
     def get_conversation_context(self) -> str:
         """Get recent conversation context for agents"""
-        recent_messages = self.conversation_history[-10:]  # Last 10 messages
-        context = []
-        for msg in recent_messages:
-            context.append(f"{msg['speaker']}: {msg['message']}")
-        return "\n".join(context)
+        # The history deque is already bounded to the context window
+        context = "\n".join(f"{msg.speaker}: {msg.message}" for msg in self.conversation_history)
+        if self.rolling_summary:
+            return f"[Summary of earlier dialogue]: {self.rolling_summary}\n{context}"
+        return context
+
+    def _start_summary(self):
+        """Fold the oldest half of the history into the rolling summary in the background once it grows past the threshold"""
+        # Only environment sessions read the summary; a jury evaluation ends long before the threshold
+        if self.mode == "presentation-jury-mode":
+            return
+        if self._summary_task is not None or len(self.conversation_history) < self.summary_threshold:
+            return
+        old_events = list(islice(self.conversation_history, len(self.conversation_history) // 2))
+        self._summary_task = asyncio.create_task(self._summarize(old_events, self.rolling_summary))
+
+    async def _summarize(self, old_events: List[ConvoEvent],
+                         previous_summary: Optional[str]) -> Optional[Tuple[str, List[ConvoEvent]]]:
+        """Summarize the given history entries, or return None if the request fails"""
+        rendered_old_half = "\n".join(f"{msg.speaker}: {msg.message}" for msg in old_events)
+        if previous_summary:
+            rendered_old_half = f"[Summary of earlier dialogue]: {previous_summary}\n{rendered_old_half}"
+
+        try:
+            async with openai_slot():
+                result = await self.model_client.create([
+                    SystemMessage(content=SUMMARY_INSTRUCTIONS),
+                    UserMessage(content=rendered_old_half, source="user")
+                ])
+        except Exception:
+            # Keep the history as-is; the deque bound still caps its size
+            logger.exception("Error summarizing conversation history")
+            return None
+
+        return (result.content, old_events) if isinstance(result.content, str) else None
+
+    def _apply_summary(self):
+        """Swap the summarized entries for the summary once the background request has finished"""
+        task = self._summary_task
+        if task is None or not task.done():
+            return
+        self._summary_task = None
+        outcome = None if task.cancelled() else task.result()
+        if outcome is None:
+            return
+
+        self.rolling_summary, summarized = outcome
+        self.summary_pending = True
+        # Drop only the entries that were summarized; the deque bound may already have dropped some
+        summarized_ids = {id(event) for event in summarized}
+        while self.conversation_history and id(self.conversation_history[0]) in summarized_ids:
+            self.conversation_history.popleft()
 
-    async def _get_jury_response(self, user_message: str, user_name: str) -> AsyncGenerator[Dict[str, Any], None]:
+    async def _get_jury_response(self, user_message: str, user_name: str, turn_ts: datetime, stream: bool) -> AsyncGenerator[SessionEvent, None]:
         """Get individual jury member response with correct thank you workflow"""
-        print(f"Getting jury response. Questions asked: {self.questions_asked}, Max: {self.max_questions}")
+        logger.debug("Getting jury response. Questions asked: %s, Max: %s", self.questions_asked, self.max_questions)
 
         # Check if evaluation is complete
         if self.questions_asked >= self.max_questions:
             # First, if someone asked the last question, they should thank the user
             if self.last_agent_who_asked is not None:
-                last_agent = None
-                last_agent_template = None
-                for i, template in enumerate(self.agent_templates):
-                    if template.name == self.last_agent_who_asked:
-                        last_agent = self.agents[i]
-                        last_agent_template = template
-                        break
-
-                if last_agent_template:
-                    # Get thank you and conclusion from the agent who asked the last question
-                    final_task = f"""The user just responded to your question: "{user_message}"
-
-Thank them for their response and conclude that the evaluation is complete. Example:
-"[thoughtful] Thank you {user_name}! [pause] I think we are done with the questions. [confident] You've shared some really valuable insights about your presentation. [happy] We appreciate you taking the time to practice with us!"
+                entry = self._by_display_name.get(self.last_agent_who_asked)
 
-Be natural and appreciative."""
-
-                    print(f"Getting final thank you and conclusion from {last_agent_template.name}")
-                    final_result = await last_agent.run(task=final_task)
+                if entry:
+                    _, last_agent_template, last_agent = entry
+                    # Get thank you and conclusion from the agent who asked the last question
+                    final_task = JURY_CONCLUSION_INSTRUCTIONS + TASK_SEPARATOR + JURY_CONCLUSION_TAIL.format(
+                        user_message=user_message, user_name=user_name
+                    )
+
+                    logger.debug("Getting final thank you and conclusion from %s", last_agent_template.name)
+                    final_result = None
+                    async for item in self._agent_turn(last_agent, final_task, last_agent_template.name, turn_ts, stream):
+                        if isinstance(item, TaskResult):
+                            final_result = item
+                        else:
+                            yield item
 
                     if final_result and final_result.messages:
                         final_response = final_result.messages[-1].content
 
-                        final_response_data = {
-                            "type": "agent_message",
-                            "agent_name": last_agent_template.name,
-                            "message": final_response,
-                            "agent_gender": last_agent_template.gender,
-                            "voice_id": last_agent_template.voice_id,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        print(f"Sending final conclusion from {last_agent_template.name}: {final_response}")
+                        final_response_data = AgentMessageEvent(
+                            agent_name=last_agent_template.name,
+                            message=final_response,
+                            agent_gender=last_agent_template.gender,
+                            voice_id=last_agent_template.voice_id,
+                            timestamp=turn_ts
+                        )
+                        logger.debug("Sending final conclusion from %s: %s", last_agent_template.name, final_response)
                         yield final_response_data
                         return
 
             # Fallback final message if no last agent found
             final_agent_template = self.agent_templates[0]
-            final_response_data = {
-                "type": "agent_message",
-                "agent_name": final_agent_template.name,
-                "message": f"[thoughtful] Thank you {user_name}! [pause] I think we are done with the questions. [confident] You've shared some really valuable insights. [happy] We appreciate your time!",
-                "agent_gender": final_agent_template.gender,
-                "voice_id": final_agent_template.voice_id,
-                "timestamp": datetime.now().isoformat()
-            }
-            print(f"Sending fallback final conclusion: {final_response_data}")
+            final_response_data = AgentMessageEvent(
+                agent_name=final_agent_template.name,
+                message=f"[thoughtful] Thank you {user_name}! [pause] I think we are done with the questions. [confident] You've shared some really valuable insights. [happy] We appreciate your time!",
+                agent_gender=final_agent_template.gender,
+                voice_id=final_agent_template.voice_id,
+                timestamp=turn_ts
+            )
+            logger.debug("Sending fallback final conclusion: %s", final_response_data)
             yield final_response_data
             return
 
         try:
             # Step 1: If someone asked the last question, they should thank the user first
+            thank_you_agent = None
+            thank_you_template = None
             if self.last_agent_who_asked is not None and user_message.strip():
                 # Find the agent who asked the last question
-                thank_you_agent = None
-                thank_you_template = None
-                for i, template in enumerate(self.agent_templates):
-                    if template.name == self.last_agent_who_asked:
-                        thank_you_agent = self.agents[i]
-                        thank_you_template = template
-                        break
-
-                if thank_you_agent and thank_you_template:
-                    thank_you_task = f"""The user just responded to your question: "{user_message}"
-
-Acknowledge their response with a brief, natural thank you. Examples:
-- "[happy] Thank you for sharing that, {user_name}!"
-- "[thoughtful] Thanks, that's really helpful to know."
-- "[curious] Great, thank you for explaining that!"
-
-Be brief and natural - just 1-2 sentences maximum."""
-
-                    print(f"Getting thank you from {thank_you_template.name} (who asked last question)")
-                    thank_you_result = await thank_you_agent.run(task=thank_you_task)
-
-                    if thank_you_result and thank_you_result.messages:
-                        thank_you_response = thank_you_result.messages[-1].content
-                        print(f"Agent {thank_you_template.name} says thank you: {thank_you_response}")
-
-                        # Send thank you response
-                        thank_you_data = {
-                            "type": "agent_message",
-                            "agent_name": thank_you_template.name,
-                            "message": thank_you_response,
-                            "agent_gender": thank_you_template.gender,
-                            "voice_id": thank_you_template.voice_id,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        print(f"Yielding thank you response: {thank_you_data}")
-                        yield thank_you_data
-
-                        # Wait 1 second before next question
-                        print("Waiting 2 second before next agent...")
-                        await asyncio.sleep(2.0)
+                entry = self._by_display_name.get(self.last_agent_who_asked)
+                if entry:
+                    _, thank_you_template, thank_you_agent = entry
 
             # Step 2: Move to next jury member for the question
             self.current_jury_index = (self.current_jury_index + 1) % len(self.agents)
             next_agent = self.agents[self.current_jury_index]
             next_agent_template = self.agent_templates[self.current_jury_index]
 
-            print(f"Next jury member asking question: {next_agent_template.name} (index {self.current_jury_index})")
+            logger.debug("Next jury member asking question: %s (index %s)", next_agent_template.name, self.current_jury_index)
 
-            # Build conversation context
-            conversation_context = self.get_conversation_context()
-
-            # Create question task for the next agent
+            # Create question task for the next agent: precomputed per-agent prefix, then this turn's data
             if self.questions_asked == 0:
                 # First question
-                question_task = f"""This is the start of a presentation evaluation.
-
-The user said: "{user_message}"
-
-Ask your first question as {next_agent_template.persona} focused on your expertise. Ask one clear, engaging question."""
+                question_task = self.first_question_prefixes[next_agent_template.name] + user_message + '"'
             else:
                 # Follow-up question
-                question_task = f"""Previous conversation:
-{conversation_context}
+                question_task = (
+                    self.followup_question_prefixes[next_agent_template.name]
+                    + self.get_conversation_context()
+                    + '\n\nThe user just responded: "' + user_message + '"'
+                )
+
+            # The question doesn't depend on the thank you, so both requests run concurrently
+            # (unless the same agent has to give both, which must stay sequential);
+            # its tokens are queued until the thank you has been sent
+            question_queue: asyncio.Queue = asyncio.Queue()
+            question_turn = self._agent_turn(next_agent, question_task, next_agent_template.name, turn_ts, stream)
+            question_job = None
+            if thank_you_agent is not next_agent:
+                logger.debug("Getting question from %s", next_agent_template.name)
+                question_job = asyncio.create_task(self._pump(question_turn, question_queue))
+
+            try:
+                if thank_you_agent and thank_you_template:
+                    thank_you_task = JURY_THANK_YOU_INSTRUCTIONS + TASK_SEPARATOR + JURY_THANK_YOU_TAIL.format(
+                        user_message=user_message, user_name=user_name
+                    )
+
+                    logger.debug("Getting thank you from %s (who asked last question)", thank_you_template.name)
+                    thank_you_result = None
+                    async for item in self._agent_turn(thank_you_agent, thank_you_task, thank_you_template.name, turn_ts, stream):
+                        if isinstance(item, TaskResult):
+                            thank_you_result = item
+                        else:
+                            yield item
 
-The user just responded: "{user_message}"
+                    if thank_you_result and thank_you_result.messages:
+                        thank_you_response = thank_you_result.messages[-1].content
+                        logger.debug("Agent %s says thank you: %s", thank_you_template.name, thank_you_response)
+
+                        # Send thank you response
+                        thank_you_data = AgentMessageEvent(
+                            agent_name=thank_you_template.name,
+                            message=thank_you_response,
+                            agent_gender=thank_you_template.gender,
+                            voice_id=thank_you_template.voice_id,
+                            timestamp=turn_ts
+                        )
+                        logger.debug("Yielding thank you response: %s", thank_you_data)
+                        yield thank_you_data
 
-Now ask your question as {next_agent_template.persona} focused on your area of expertise. Ask one clear, engaging question that builds on the conversation."""
+                        # Pause before the next question; the question request keeps running meanwhile
+                        logger.debug("Waiting 2 second before next agent...")
+                        await asyncio.sleep(2.0)
 
-            # Get question from next jury agent
-            print(f"Getting question from {next_agent_template.name}")
-            question_result = await next_agent.run(task=question_task)
+                # Get question from next jury agent
+                if question_job is None:
+                    logger.debug("Getting question from %s", next_agent_template.name)
+                    question_job = asyncio.create_task(self._pump(question_turn, question_queue))
+                question_result = None
+                async for item in self._drain(question_queue, question_job):
+                    if isinstance(item, TaskResult):
+                        question_result = item
+                    else:
+                        yield item
+            finally:
+                if question_job is not None and not question_job.done():
+                    question_job.cancel()
 
             if question_result and question_result.messages:
                 agent_response = question_result.messages[-1].content
-                print(f"Agent {next_agent_template.name} asked: {agent_response}")
+                logger.debug("Agent %s asked: %s", next_agent_template.name, agent_response)
 
                 # Add to conversation history
-                self.conversation_history.append({
-                    "speaker": next_agent_template.name,
-                    "message": agent_response,
-                    "timestamp": datetime.now().isoformat(),
-                    "type": "agent"
-                })
-
-                # Mark this jury member as having spoken and track as last asker
-                self.jury_has_spoken[next_agent_template.name] = True
+                self.conversation_history.append(ConvoEvent(next_agent_template.name, agent_response, turn_ts, "agent"))
+
+                # Track this jury member as the last asker
                 self.questions_asked += 1
                 self.last_agent_who_asked = next_agent_template.name  # Track who asked this question
 
                 # Prepare response data
-                question_data = {
-                    "type": "agent_message",
-                    "agent_name": next_agent_template.name,
-                    "message": agent_response,
-                    "agent_gender": next_agent_template.gender,
-                    "voice_id": next_agent_template.voice_id,
-                    "timestamp": datetime.now().isoformat()
-                }
-                print(f"Yielding question from {next_agent_template.name}")
+                question_data = AgentMessageEvent(
+                    agent_name=next_agent_template.name,
+                    message=agent_response,
+                    agent_gender=next_agent_template.gender,
+                    voice_id=next_agent_template.voice_id,
+                    timestamp=turn_ts
+                )
+                logger.debug("Yielding question from %s", next_agent_template.name)
 
                 yield question_data
 
             else:
-                print(f"No valid question from {next_agent_template.name}")
+                logger.debug("No valid question from %s", next_agent_template.name)
 
         except openai.RateLimitError as e:
-            print(f"OpenAI API quota exceeded in jury mode: {e}")
+            logger.error("OpenAI API quota exceeded in jury mode: %s", e)
             yield {
                 "type": "error",
                 "message": "Sorry, we've reached our daily AI conversation limit. Please try again later or contact support to increase the quota.",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
         except openai.AuthenticationError as e:
-            print(f"OpenAI API authentication error in jury mode: {e}")
+            logger.error("OpenAI API authentication error in jury mode: %s", e)
             yield {
                 "type": "error",
                 "message": "Authentication issue with AI service. Please contact support.",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
         except Exception as e:
-            print(f"Error getting jury response: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting jury response")
             yield {
                 "type": "error",
                 "message": f"Sorry, there was an unexpected error: {str(e)[:100]}...",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
 
-    async def _get_environment_response(self, user_message: str, user_name: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Get group chat response for environment mode with enhanced memory and interaction"""
-        print(f"Getting environment group chat response. Turn {self.conversation_turns}/{self.max_conversation_turns}")
-
-        # Check if conversation limit reached
-        if self.conversation_turns >= self.max_conversation_turns:
-            print("Conversation turns limit reached")
-            return
-
-        if not self.group_chat:
-            print("Error: No group chat initialized for environment mode")
-            return
+    async def _agent_turn(self, agent: AssistantAgent, task: Union[str, List[TextMessage]], agent_name: str,
+                          turn_ts: datetime, stream: bool) -> AsyncGenerator[Union[AgentMessageDelta, TaskResult], None]:
+        """Run one agent within the rate and concurrency limits, yielding token deltas (when streaming) and then its TaskResult"""
+        async with openai_slot():
+            if not stream:
+                yield await agent.run(task=task)
+                return
+            async for item in agent.run_stream(task=task):
+                if isinstance(item, ModelClientStreamingChunkEvent):
+                    yield AgentMessageDelta(agent_name, item.content, turn_ts)
+                elif isinstance(item, TaskResult):
+                    yield item
+
+    @staticmethod
+    async def _pump(source: AsyncGenerator, queue: asyncio.Queue):
+        """Forward an agent turn into a queue so it can run ahead of its consumer"""
+        try:
+            async for item in source:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(_STREAM_END)
+
+    @staticmethod
+    async def _drain(queue: asyncio.Queue, job: "asyncio.Task[None]") -> AsyncGenerator[Any, None]:
+        """Yield what a pump queued until its turn ends, then surface the pump's error, if any"""
+        while (item := await queue.get()) is not _STREAM_END:
+            yield item
+        await job
+
+    async def _get_environment_response(self, user_message: str, user_name: str, turn_ts: datetime, stream: bool) -> AsyncGenerator[SessionEvent, None]:
+        """Get concurrent responses from several environment agents with enhanced memory and interaction"""
+        logger.debug("Getting environment response. Turn %s", self.conversation_turns)
 
         try:
             # Increment conversation turn
             self.conversation_turns += 1
 
-            # Build rich conversation context with memory
-            conversation_context = self.get_conversation_context()
+            # Each agent keeps its own bounded message buffer, so it is only sent the new message
+            task = [TextMessage(content=user_message, source=user_name)]
+            if self.summary_pending:
+                # Share a freshly folded summary once, ahead of the new message
+                task.insert(0, TextMessage(
+                    content=f"[Summary of earlier dialogue]: {self.rolling_summary}", source=user_name
+                ))
+                self.summary_pending = False
 
-            # Create enriched prompt with conversation memory
-            enriched_message = f"""
-Previous conversation context:
-{conversation_context}
-
-User just said: "{user_message}"
-
-As an agent in this conversation, respond naturally based on:
-1. What the user just said
-2. The conversation history above
-3. Your personality and role
-4. Build on what others have said
-5. Ask follow-up questions to keep the conversation engaging
-
-Respond naturally and conversationally. Reference previous topics when relevant.
-"""
-
-            # Create message for agents
-            message = TextMessage(content=enriched_message, source=user_name)
-            print(f"Created enriched TextMessage with conversation context")
-
-            # Store user message for filtering purposes
-            user_input_for_filtering = user_message.strip().lower()
-
-            # Get responses from 2-3 agents for more dynamic interaction
-            response_count = 0
+            # Get responses from 2-3 agents for more dynamic interaction, taking turns round-robin
             max_responses = 3 if len(self.conversation_history) > 5 else 2  # More responses as conversation develops
-            responding_agents = set()  # Track which agents have responded to avoid duplicates
-
-            # Create task list with enriched message for Autogen
-            task = [message]
-
-            print(f"Starting enhanced group chat stream with {len(self.agents)} agents (max responses: {max_responses})")
-            async for response in self.group_chat.run_stream(task=task):
-                print(f"Received response from group chat: {type(response)} - {response}")
-
-                if response_count >= max_responses:
-                    print(f"Reached max responses limit ({max_responses})")
-                    break
-
-                if hasattr(response, 'content') and response.content.strip():
-                    print(f"Processing valid response from {response.source}: '{response.content[:100]}...'")
-
-                    # Skip if this is echoing the user's input (common with Autogen)
-                    if (response.content.strip().lower() == user_input_for_filtering or
-                        response.content.strip() == user_message.strip()):
-                        print(f"Skipping echo of user message: '{response.content}'")
+            response_count = min(max_responses, len(self.agents))
+            selected = [(self.current_speaker_index + k) % len(self.agents) for k in range(response_count)]
+            self.current_speaker_index = (self.current_speaker_index + response_count) % len(self.agents)
+
+            # The selected agents answer the same message, so ask them all at once;
+            # each one's output is queued and replayed in speaker order
+            jobs = []
+            for index in selected:
+                queue: asyncio.Queue = asyncio.Queue()
+                turn = self._agent_turn(self.agents[index], task, self.agent_templates[index].name, turn_ts, stream)
+                jobs.append((index, queue, asyncio.create_task(self._pump(turn, queue))))
+
+            logger.debug("Requesting %s concurrent agent responses", response_count)
+
+            try:
+                # Yield in speaker order
+                response_count = 0
+                for index, queue, job in jobs:
+                    result = None
+                    async for item in self._drain(queue, job):
+                        if isinstance(item, TaskResult):
+                            result = item
+                        else:
+                            yield item
+
+                    if not result or not result.messages:
                         continue
-
-                    # Skip if the response is from the user (not an agent)
-                    if response.source == user_name or response.source == "User":
-                        print(f"Skipping user-generated response: {response.source}")
-                        continue
-
-                    # Ensure the response is from one of our known agents
-                    if response.source not in self.agent_name_mapping:
-                        print(f"Skipping response from unknown source: {response.source}")
-                        continue
-
-                    # Skip if this agent already responded in this turn (avoid duplicates)
-                    if response.source in responding_agents:
-                        print(f"Agent {response.source} already responded this turn, skipping duplicate")
-                        continue
-
-                    # Filter out system/context messages that might leak through
-                    if "Previous conversation context:" in response.content or "User just said:" in response.content:
-                        print(f"Skipping system/context message from {response.source}")
+                    content = result.messages[-1].content
+                    if not isinstance(content, str) or not content.strip():
+                        logger.debug("Skipping invalid/empty response from %s", self.agents[index].name)
                         continue
 
-                    responding_agents.add(response.source)
+                    agent_template = self.agent_templates[index]
 
                     # Add response to conversation history
-                    self.conversation_history.append({
-                        "speaker": response.source,
-                        "message": response.content,
-                        "timestamp": datetime.now().isoformat(),
-                        "type": "agent"
-                    })
-
-                    # Get agent details and display name
-                    agent_template = self.get_agent_template_by_name(response.source)
-                    display_name = self.agent_name_mapping.get(response.source, response.source)
-                    print(f"Mapped {response.source} to display name: {display_name}")
-
-                    response_data = {
-                        "type": "agent_message",
-                        "agent_name": display_name,  # Use display name for frontend
-                        "message": response.content,
-                        "agent_gender": agent_template.gender if agent_template else "female",
-                        "voice_id": agent_template.voice_id if agent_template else "EXAVITQu4vr4xnSDxMaL",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    print(f"Yielding environment response from {display_name}: {response.content[:50]}...")
+                    self.conversation_history.append(ConvoEvent(agent_template.name, content, turn_ts, "agent"))
+
+                    response_data = AgentMessageEvent(
+                        agent_name=agent_template.name,  # Use display name for frontend
+                        message=content,
+                        agent_gender=agent_template.gender,
+                        voice_id=agent_template.voice_id,
+                        timestamp=turn_ts,
+                        # Natural delay between responses is applied by the client, not here
+                        display_after_ms=ENVIRONMENT_RESPONSE_DELAY_MS
+                    )
+                    logger.debug("Yielding environment response from %s: %s...", agent_template.name, content[:50])
 
                     yield response_data
 
                     response_count += 1
+            finally:
+                for _, _, job in jobs:
+                    if not job.done():
+                        job.cancel()
 
-                    # Add natural delay between responses for better conversation flow
-                    await asyncio.sleep(3.0)
-                else:
-                    print(f"Skipping invalid/empty response: {response}")
-
-            print(f"Completed environment turn {self.conversation_turns} with {response_count} agent responses")
+            logger.debug("Completed environment turn %s with %s agent responses", self.conversation_turns, response_count)
 
         except openai.RateLimitError as e:
-            print(f"OpenAI API quota exceeded: {e}")
+            logger.error("OpenAI API quota exceeded: %s", e)
             yield {
                 "type": "error",
                 "message": "Sorry, we've reached our daily AI conversation limit. Please try again later or contact support to increase the quota.",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
         except openai.AuthenticationError as e:
-            print(f"OpenAI API authentication error: {e}")
+            logger.error("OpenAI API authentication error: %s", e)
             yield {
                 "type": "error",
                 "message": "Authentication issue with AI service. Please contact support.",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
         except Exception as e:
-            print(f"Error getting environment response: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting environment response")
             yield {
                 "type": "error",
                 "message": f"Sorry, there was an unexpected error: {str(e)[:100]}...",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": turn_ts
             }
 
+    def close(self):
+        """Free the session's agents and history (the model client is shared and stays open)"""
+        self.agents.clear()
+        self._by_display_name.clear()
+        self._by_internal_name.clear()
+        self.conversation_history.clear()
+        self.rolling_summary = None
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+            self._summary_task = None
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert session to dictionary for API responses"""
         agent_info = []
-        if self.mode == "presentation-jury-mode":
-            templates = ConversationTemplates.get_presentation_jury_mode()
-        else:
-            templates = ConversationTemplates.get_environment_mode(self.environment_type)
-
-        for template in templates:
+        # Templates were stored in setup_agents; no need to resolve them again
+        for template in self.agent_templates:
             agent_info.append({
                 "name": template.name,
                 "persona": template.persona,
@@ -522,33 +686,40 @@ class AutogenService:
     """Service for managing multiple conversation sessions"""
 
     def __init__(self):
-        self.sessions: Dict[str, ConversationSession] = {}
+        # Bounded by count and idle time; evicted sessions are closed
+        self.sessions = SessionCache()
+
+    def build_session(self, session_id: str, mode: str, environment_type: str = "school") -> ConversationSession:
+        """Build a conversation session without storing it (safe to run in a worker thread)"""
+        return ConversationSession(
+            session_id, mode, _shared_model_client(), environment_type
+        )
 
     def create_session(self, session_id: str, mode: str, environment_type: str = "school") -> ConversationSession:
         """Create a new conversation session"""
-        session = ConversationSession(session_id, mode, environment_type)
-        self.sessions[session_id] = session
+        session = self.build_session(session_id, mode, environment_type)
+        self.sessions.put(session_id, session)
         return session
 
     def get_session(self, session_id: str) -> Optional[ConversationSession]:
-        """Get existing session by ID"""
-        return self.sessions.get(session_id)
+        """Get existing session by ID, restarting its idle timer"""
+        return self.sessions.touch(session_id)
 
     def reset_session(self, session_id: str):
         """Reset or remove a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.sessions.discard(session_id)
 
-    async def get_agent_responses(self, session_id: str, user_message: str, user_name: str = "User") -> AsyncGenerator[Dict[str, Any], None]:
-        """Get agent responses for a session"""
+    async def get_agent_responses(self, session_id: str, user_message: str, user_name: str = "User",
+                                  stream: bool = False) -> AsyncGenerator[SessionEvent, None]:
+        """Get agent responses for a session (complete replies, or token deltas followed by each reply with stream=True)"""
         session = self.get_session(session_id)
         if not session:
             yield {
                 "type": "error",
                 "message": "Session not found",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now()
             }
             return
 
-        async for response in session.get_agent_response(user_message, user_name):
+        async for response in session.get_agent_response(user_message, user_name, stream):
             yield response
\ No newline at end of file
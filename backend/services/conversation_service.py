@@ -2,245 +2,525 @@
 # Separate conversation mode service to handle multi-agent conversations without affecting jury mode
 
 import asyncio
+import functools
 import json
+import logging
 import os
-from typing import List, Dict, Any, Optional, AsyncGenerator, Set
+import re
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import List, Dict, Any, Optional, AsyncGenerator, Callable, Deque, Set, Tuple
 from datetime import datetime
 from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.conditions import MaxMessageTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.messages import TextMessage
+from autogen_core.models import SystemMessage, UserMessage
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 from agents.templates import ConversationTemplates, AgentTemplate
+from services.http_pool import openai_slot, shared_http_client
+from services.session_cache import SessionCache
 from dotenv import load_dotenv
 from pathlib import Path
 import openai
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
+# Pause the client keeps between consecutive agent messages
+ENVIRONMENT_RESPONSE_DELAY_MS = 2500
+
+# Once the history reaches SUMMARY_THRESHOLD entries, its oldest half is folded into a rolling summary
+SUMMARY_INSTRUCTIONS = "Summarize the following dialogue in 150 tokens, preserving names, decisions, open questions"
+SUMMARY_THRESHOLD = 16
+
+# Replayable turns kept per session for exact repeats of a message
+RESPONSE_CACHE_SIZE = 64
+
+# Opt-in (SEMANTIC_CACHE=1) reuse of a turn for paraphrases of an earlier message; only early in
+# a conversation, where questions like "who are you?" don't depend on what was said before
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_DIMENSIONS = 256
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_MAX_HISTORY = 6
+SEMANTIC_CACHE_SIZE = 64
+
+# Pieces of the turn prompt that mean an agent echoed its instructions back, matched in one scan
+_LEAK_RE = re.compile(r"As an agent in this conversation, respond naturally|Previous conversation context:|User just said:")
+
+
+@functools.lru_cache(maxsize=4)
+def _shared_model_client(model: str, temperature: float, max_tokens: int) -> OpenAIChatCompletionClient:
+    """One model client (and connection pool) per model config, shared by every session"""
+    return OpenAIChatCompletionClient(
+        model=model,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        http_client=shared_http_client()
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _embedding_client() -> openai.AsyncOpenAI:
+    """OpenAI client for the semantic cache's embeddings, on the shared connection pool"""
+    return openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=shared_http_client())
+
+
+class AgentTeam:
+    """One roster's agents and the team that runs them; used by a single turn at a time"""
+
+    def __init__(self, templates: Tuple[AgentTemplate, ...], max_responses: int,
+                 model_client: OpenAIChatCompletionClient):
+        self.templates = templates
+        self.max_responses = max_responses
+        self.agents = [
+            AssistantAgent(
+                name=template.valid_name,
+                model_client=model_client,
+                system_message=template.system_prompt
+            )
+            for template in templates
+        ]
+        # The task message plus one reply per budgeted agent; the run ends before any further
+        # agent is called, since termination is only checked after each message
+        self.group_chat = RoundRobinGroupChat(
+            participants=self.agents,
+            termination_condition=MaxMessageTermination(min(max_responses, len(self.agents)) + 1)
+        )
+
+
+class AgentPool:
+    """Idle agent teams per roster and response budget, checked out by sessions for one turn at a time
+
+    Agents keep no state between turns (each turn starts with a team reset), so sessions of the
+    same environment can share them instead of each building their own.
+    """
+
+    def __init__(self, model_client_factory: Callable[[], OpenAIChatCompletionClient], max_idle: int = 8):
+        self.model_client_factory = model_client_factory  # Called when the first team is built
+        self.max_idle = max_idle  # Idle teams kept per roster and budget
+        self._idle: Dict[Tuple[Tuple[AgentTemplate, ...], int], List[AgentTeam]] = {}
+
+    def acquire(self, templates: Tuple[AgentTemplate, ...], max_responses: int) -> AgentTeam:
+        """Take an idle team for this roster and budget, building one if none is free"""
+        idle = self._idle.get((templates, max_responses))
+        return idle.pop() if idle else AgentTeam(templates, max_responses, self.model_client_factory())
+
+    def release(self, team: AgentTeam):
+        """Return a team whose run has finished"""
+        idle = self._idle.setdefault((team.templates, team.max_responses), [])
+        if len(idle) < self.max_idle:
+            idle.append(team)
+
+
 class ConversationSession:
     """Manages conversation mode sessions with proper group chat handling"""
 
-    def __init__(self, session_id: str, environment_type: str = "school"):
+    # Static instructions lead the turn prompt, so every turn shares the same prefix
+    # (and can be served from OpenAI's prompt cache); context and the new message come last
+    _STATIC_PROMPT_PREFIX = """As an agent in this conversation, respond naturally based on:
+1. What the user just said
+2. The conversation history below
+3. Your personality and role
+4. Build on what others have said
+5. Ask follow-up questions to keep the conversation engaging
+
+Respond naturally and conversationally. Reference previous topics when relevant."""
+
+    def __init__(self, session_id: str, agent_pool: AgentPool, environment_type: str = "school"):
         self.session_id = session_id
+        self.agent_pool = agent_pool  # Shared across sessions by ConversationService
         self.environment_type = environment_type
-        self.agents: List[AssistantAgent] = []
         self.agent_templates: List[AgentTemplate] = []
         self.agent_name_mapping: Dict[str, str] = {}
-        self.conversation_history: List[Dict[str, Any]] = []
+        self.agent_template_by_valid_name: Dict[str, AgentTemplate] = {}  # Also keyed by display name
+        # Bounded history; total_messages keeps counting past the bound for reporting
+        self.conversation_history: Deque[Dict[str, Any]] = deque(maxlen=200)
+        self.total_messages = 0
         self.conversation_turns = 0
-        self.max_conversation_turns = 20
+        # Older history is folded into a rolling summary instead of ending the conversation after a
+        # fixed number of turns; the summary request runs alongside a turn and is applied on a later one
+        self.rolling_summary: Optional[str] = None
+        self._summary_task: Optional["asyncio.Task[Optional[Tuple[str, List[Dict[str, Any]]]]]"] = None
+        # (environment, normalized message, history tail hash) -> [(speaker, response_data)] of a finished turn
+        self._response_cache: "OrderedDict[Tuple[str, str, int], List[Tuple[str, Dict[str, Any]]]]" = OrderedDict()
+        # (unit-length message embedding, [(speaker, response_data)]) for the semantic cache
+        self._semantic_cache: Deque[Tuple[List[float], List[Tuple[str, Dict[str, Any]]]]] = deque(maxlen=SEMANTIC_CACHE_SIZE)
 
         self.setup_agents()
 
     def setup_agents(self):
-        """Initialize agents for conversation mode"""
-        # Get model client
-        api_key = os.getenv("OPENAI_API_KEY")
-        model_client = OpenAIChatCompletionClient(
-            model="gpt-4o-mini",
-            api_key=api_key,
-            temperature=0.7,
-            max_tokens=300
-        )
-
-        # Get agent templates for environment mode
-        templates = ConversationTemplates.get_environment_mode(self.environment_type)
+        """Resolve the agent roster for conversation mode (the agents themselves come from the pool per turn)"""
+        # Get agent templates for environment mode; the cached tuple also keys the agent pool
+        self._roster = ConversationTemplates.get_environment_mode(self.environment_type)
 
-        # Create Autogen agents
-        for template in templates:
-            # Convert name to valid Python identifier
-            valid_name = template.name.replace(" ", "_").replace("-", "_").lower()
+        for template in self._roster:
+            # Identifier form of the name, computed once per template
+            valid_name = template.valid_name
 
             # Store template and name mapping
             self.agent_templates.append(template)
             self.agent_name_mapping[valid_name] = template.name
+            self.agent_template_by_valid_name[valid_name] = template
+            self.agent_template_by_valid_name.setdefault(template.name, template)
 
-            agent = AssistantAgent(
-                name=valid_name,
-                model_client=model_client,
-                system_message=template.system_prompt
-            )
-            self.agents.append(agent)
+        # Agent names never change after setup; freeze them for the per-response source check
+        self._valid_sources = frozenset(self.agent_name_mapping)
+
+        self._chat_lock = asyncio.Lock()  # A session runs its turns one at a time
 
     def get_agent_template_by_name(self, name: str) -> Optional[AgentTemplate]:
         """Get agent template by internal agent name"""
-        display_name = self.agent_name_mapping.get(name, name)
-        for template in self.agent_templates:
-            if template.name == display_name:
-                return template
-        return None
+        # Internal names and display names both resolve with one lookup
+        return self.agent_template_by_valid_name.get(name)
+
+    def _append_history(self, entry: Dict[str, Any]):
+        """Record a history entry, pre-rendering its context line"""
+        entry["_formatted"] = f"{entry['speaker']}: {entry['message']}"
+        self.conversation_history.append(entry)
+        self.total_messages += 1
+
+    def _history_tail_hash(self) -> int:
+        """Hash of the last few history lines, identifying the state a message is answered in"""
+        return hash(tuple(msg["_formatted"] for msg in islice(reversed(self.conversation_history), 4)))
+
+    def _cache_key(self, user_message: str) -> Tuple[str, str, int]:
+        return (self.environment_type, user_message.strip().lower(), self._history_tail_hash())
+
+    def _cache_responses(self, key: Tuple[str, str, int], responses: List[Tuple[str, Dict[str, Any]]]):
+        """Remember a finished turn, evicting the least recently used one past RESPONSE_CACHE_SIZE"""
+        self._response_cache[key] = responses
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """Unit-length embedding of a message, or None if the request fails"""
+        try:
+            async with openai_slot():
+                result = await _embedding_client().embeddings.create(
+                    model=SEMANTIC_CACHE_MODEL, input=text, dimensions=SEMANTIC_CACHE_DIMENSIONS
+                )
+        except openai.OpenAIError as e:
+            logger.warning("Semantic cache embedding failed: %s", e)
+            return None
+        vector = result.data[0].embedding
+        norm = sum(x * x for x in vector) ** 0.5
+        return [x / norm for x in vector] if norm else None
+
+    def _semantic_lookup(self, embedding: List[float]) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """Replies of the most similar cached message, if it is similar enough"""
+        best_score, best = 0.0, None
+        for cached_embedding, responses in self._semantic_cache:
+            # Both vectors are unit length, so the dot product is the cosine similarity
+            score = sum(a * b for a, b in zip(embedding, cached_embedding))
+            if score > best_score:
+                best_score, best = score, responses
+        return best if best_score >= SEMANTIC_CACHE_THRESHOLD else None
+
+    async def _replay_responses(self, cached: List[Tuple[str, Dict[str, Any]]]) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield a cached turn's replies with a fresh timestamp, recording them in the history"""
+        for speaker, cached_data in cached:
+            response_data = dict(cached_data, timestamp=datetime.now().isoformat())
+            self._append_history({
+                "speaker": speaker,
+                "message": response_data["message"],
+                "timestamp": response_data["timestamp"],
+                "type": "agent"
+            })
+            yield response_data
 
     def get_conversation_context(self) -> str:
         """Get recent conversation context for agents"""
-        recent_messages = self.conversation_history[-10:]  # Last 10 messages
-        context = []
-        for msg in recent_messages:
-            context.append(f"{msg['speaker']}: {msg['message']}")
-        return "\n".join(context)
+        # Last 10 messages, read from the right end of the deque
+        recent_messages = list(islice(reversed(self.conversation_history), 10))[::-1]
+        context = "\n".join(msg["_formatted"] for msg in recent_messages)
+        if self.rolling_summary:
+            return f"[Summary of earlier dialogue]: {self.rolling_summary}\n{context}"
+        return context
+
+    def _start_summary(self):
+        """Summarize the oldest half of the history in the background once it reaches the threshold"""
+        if self._summary_task is not None or len(self.conversation_history) < SUMMARY_THRESHOLD:
+            return
+        old_entries = list(islice(self.conversation_history, len(self.conversation_history) // 2))
+        self._summary_task = asyncio.create_task(self._summarize(old_entries, self.rolling_summary))
+
+    async def _summarize(self, old_entries: List[Dict[str, Any]],
+                         previous_summary: Optional[str]) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Summarize the given history entries, or return None if the request fails"""
+        rendered_old_half = "\n".join(msg["_formatted"] for msg in old_entries)
+        if previous_summary:
+            rendered_old_half = f"[Summary of earlier dialogue]: {previous_summary}\n{rendered_old_half}"
+
+        try:
+            async with openai_slot():
+                result = await self.agent_pool.model_client_factory().create([
+                    SystemMessage(content=SUMMARY_INSTRUCTIONS),
+                    UserMessage(content=rendered_old_half, source="user")
+                ])
+        except Exception:
+            # Keep the history as-is; the deque bound still caps its size
+            logger.exception("Error summarizing conversation history")
+            return None
+
+        return (result.content, old_entries) if isinstance(result.content, str) else None
+
+    def _apply_summary(self):
+        """Swap the summarized entries for the summary once the background request has finished"""
+        task = self._summary_task
+        if task is None or not task.done():
+            return
+        self._summary_task = None
+        outcome = None if task.cancelled() else task.result()
+        if outcome is None:
+            return
+
+        self.rolling_summary, summarized = outcome
+        # Drop only the entries that were summarized; later ones were appended meanwhile
+        summarized_ids = {id(entry) for entry in summarized}
+        while self.conversation_history and id(self.conversation_history[0]) in summarized_ids:
+            self.conversation_history.popleft()
 
     async def get_agent_responses(self, user_message: str, user_name: str = "User") -> AsyncGenerator[Dict[str, Any], None]:
         """Get responses from agents for conversation mode"""
-        print(f"Getting conversation response for: '{user_message}' from {user_name}")
+        logger.debug("Getting conversation response for: '%s' from %s", user_message, user_name)
+
+        # Fold in a summary finished since an earlier turn, without waiting for one still running
+        self._apply_summary()
+
+        # Looked up in the state before this message, i.e. right after the turn being retried
+        cache_key = self._cache_key(user_message)
+        use_semantic_cache = SEMANTIC_CACHE_ENABLED and self.total_messages <= SEMANTIC_CACHE_MAX_HISTORY
 
         # Add user message to conversation history
-        self.conversation_history.append({
+        self._append_history({
             "speaker": user_name,
             "message": user_message,
             "timestamp": datetime.now().isoformat(),
             "type": "user"
         })
 
-        # Check if conversation limit reached
-        if self.conversation_turns >= self.max_conversation_turns:
-            print("Conversation turns limit reached")
-            return
+        # Summarize concurrently with this turn's request, so it never adds to the reply latency
+        self._start_summary()
 
-        try:
-            # Increment conversation turn
-            self.conversation_turns += 1
+        # Replayed turns are counted too
+        self.conversation_turns += 1
 
-            # Create a fresh group chat for each conversation turn
-            # This prevents "team already running" errors
-            group_chat = RoundRobinGroupChat(participants=self.agents)
+        # The same message sent again in the same state replays the earlier answers without calling OpenAI
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            self._response_cache.move_to_end(cache_key)
+            logger.debug("Replaying %s cached responses", len(cached))
+            async for response_data in self._replay_responses(cached):
+                yield response_data
+            return
 
+        # Early in the conversation, a paraphrase of an earlier message can reuse its answers too
+        embedding = await self._embed(user_message.strip().lower()) if use_semantic_cache else None
+        if embedding is not None:
+            cached = self._semantic_lookup(embedding)
+            if cached is not None:
+                logger.debug("Replaying %s semantically cached responses", len(cached))
+                async for response_data in self._replay_responses(cached):
+                    yield response_data
+                return
+
+        try:
             # Build conversation context
             conversation_context = self.get_conversation_context()
 
-            # Create enriched prompt with conversation memory
-            enriched_message = f"""
-Previous conversation context:
-{conversation_context}
-
-User just said: "{user_message}"
-
-As an agent in this conversation, respond naturally based on:
-1. What the user just said
-2. The conversation history above
-3. Your personality and role
-4. Build on what others have said
-5. Ask follow-up questions to keep the conversation engaging
-
-Respond naturally and conversationally. Reference previous topics when relevant.
-"""
+            # Create enriched prompt with conversation memory: static instructions first, then this turn's data
+            enriched_message = (
+                f"{self._STATIC_PROMPT_PREFIX}\n\n"
+                f"Previous conversation context:\n{conversation_context}\n\n"
+                f'User just said: "{user_message}"'
+            )
 
             # Create message for agents
             message = TextMessage(content=enriched_message, source=user_name)
-            print(f"Created enriched message for conversation turn {self.conversation_turns}")
+            logger.debug("Created enriched message for conversation turn %s", self.conversation_turns)
 
             # Get responses from agents
-            response_count = 0
             max_responses = 3 if len(self.conversation_history) > 5 else 2
-            responding_agents: Set[str] = set()
-            user_input_lower = user_message.strip().lower()
+            turn_responses: List[Tuple[str, Dict[str, Any]]] = []
 
             # Create task for group chat
             task = [message]
 
-            print(f"Starting group chat with {len(self.agents)} agents (max responses: {max_responses})")
-            async for response in group_chat.run_stream(task=task):
-                print(f"Received response: {type(response)} from {getattr(response, 'source', 'unknown')}")
-
-                if response_count >= max_responses:
-                    print(f"Reached max responses limit ({max_responses})")
-                    break
-
-                if hasattr(response, 'content') and response.content.strip():
-                    # Filter out echoes and invalid responses
-                    if (response.content.strip().lower() == user_input_lower or
-                        response.content.strip() == user_message.strip()):
-                        print(f"Skipping echo: '{response.content}'")
-                        continue
-
-                    # Skip user responses
-                    if response.source == user_name or response.source == "User":
-                        print(f"Skipping user response: {response.source}")
-                        continue
-
-                    # Ensure response is from known agent
-                    if response.source not in self.agent_name_mapping:
-                        print(f"Skipping unknown agent: {response.source}")
-                        continue
-
-                    # Avoid duplicate responses from same agent
-                    if response.source in responding_agents:
-                        print(f"Agent {response.source} already responded, skipping")
-                        continue
-
-                    # Filter out system messages that leak through
-                    if ("Previous conversation context:" in response.content or
-                        "User just said:" in response.content):
-                        print(f"Skipping system message from {response.source}")
-                        continue
-
-                    responding_agents.add(response.source)
-
-                    # Add to conversation history
-                    self.conversation_history.append({
-                        "speaker": response.source,
-                        "message": response.content,
-                        "timestamp": datetime.now().isoformat(),
-                        "type": "agent"
-                    })
-
-                    # Get agent details
-                    agent_template = self.get_agent_template_by_name(response.source)
-                    display_name = self.agent_name_mapping.get(response.source, response.source)
-
-                    response_data = {
-                        "type": "agent_message",
-                        "agent_name": display_name,
-                        "message": response.content,
-                        "agent_gender": agent_template.gender if agent_template else "female",
-                        "voice_id": agent_template.voice_id if agent_template else "EXAVITQu4vr4xnSDxMaL",
-                        "timestamp": datetime.now().isoformat()
-                    }
-
-                    print(f"Yielding response from {display_name}: {response.content[:50]}...")
-                    yield response_data
-
-                    response_count += 1
-
-                    # Natural delay between responses
-                    await asyncio.sleep(2.5)
-
-            print(f"Completed conversation turn {self.conversation_turns} with {response_count} responses")
+            # A background task drives the team and queues validated replies, so the next agent
+            # keeps generating while the current reply is sent to the client
+            queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+            producer = asyncio.create_task(
+                self._drive_group_chat(task, queue, user_message, user_name, max_responses)
+            )
+            try:
+                while (item := await queue.get()) is not None:
+                    turn_responses.append(item)
+                    yield item[1]
+                # Surface whatever ended the run early to the handlers below
+                await producer
+            finally:
+                if not producer.done():
+                    producer.cancel()
+
+            logger.debug("Completed conversation turn %s with %s responses", self.conversation_turns, len(turn_responses))
+
+            # Keyed on the state a retry of this message would see
+            if turn_responses:
+                self._cache_responses(self._cache_key(user_message), turn_responses)
+                if embedding is not None:
+                    self._semantic_cache.append((embedding, turn_responses))
 
         except openai.RateLimitError as e:
-            print(f"OpenAI API quota exceeded in conversation mode: {e}")
+            logger.error("OpenAI API quota exceeded in conversation mode: %s", e)
             yield {
                 "type": "error",
                 "message": "Sorry, we've reached our daily AI conversation limit. Please try again later or contact support to increase the quota.",
                 "timestamp": datetime.now().isoformat()
             }
         except openai.AuthenticationError as e:
-            print(f"OpenAI API authentication error in conversation mode: {e}")
+            logger.error("OpenAI API authentication error in conversation mode: %s", e)
             yield {
                 "type": "error",
                 "message": "Authentication issue with AI service. Please contact support.",
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
-            print(f"Error in conversation response: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in conversation response")
             yield {
                 "type": "error",
                 "message": f"Sorry, there was an error: {str(e)[:100]}...",
                 "timestamp": datetime.now().isoformat()
             }
 
+    def _is_valid_agent_response(self, response: Any, stripped: str, user_name: str, user_input_lower: str,
+                                 stripped_user_message: str, responding_agents: Set[str]) -> bool:
+        """Whether a streamed event is a new, non-echo reply from a known agent; cheapest checks first"""
+        if not stripped:
+            return False
+
+        source = response.source
+
+        # Skip user responses
+        if source == user_name or source == "User":
+            logger.debug("Skipping user response: %s", source)
+            return False
+
+        # Ensure response is from known agent
+        if source not in self._valid_sources:
+            logger.debug("Skipping unknown agent: %s", source)
+            return False
+
+        # Avoid duplicate responses from same agent
+        if source in responding_agents:
+            logger.debug("Agent %s already responded, skipping", source)
+            return False
+
+        # Filter out echoes of the user message
+        if stripped == stripped_user_message or stripped.lower() == user_input_lower:
+            logger.debug("Skipping echo: '%s'", stripped)
+            return False
+
+        # Filter out system messages that leak through
+        if _LEAK_RE.search(stripped):
+            logger.debug("Skipping system message from %s", source)
+            return False
+
+        return True
+
+    async def _drive_group_chat(self, task: List[TextMessage], queue: asyncio.Queue,
+                                user_message: str, user_name: str, max_responses: int):
+        """Run one team turn, queueing (speaker, response_data) for each valid reply and None when done"""
+        responding_agents: Set[str] = set()
+        stripped_user_message = user_message.strip()
+        user_input_lower = stripped_user_message.lower()
+
+        try:
+            logger.debug("Starting group chat with %s agents (max responses: %s)", len(self._roster), max_responses)
+            # A team calls its agents one after another, so the turn holds one concurrency slot
+            # and takes one request per budgeted reply from the shared rate limit
+            async with self._chat_lock, openai_slot(min(max_responses, len(self._roster))):
+                team = self.agent_pool.acquire(self._roster, max_responses)
+                # Clears whatever the pooled agents saw in their previous turn
+                await team.group_chat.reset()
+                stream = team.group_chat.run_stream(task=task)
+                try:
+                    async for response in stream:
+                        logger.debug("Received response: %s from %s", type(response), getattr(response, 'source', 'unknown'))
+
+                        # Strip each reply once for all the checks below
+                        content = getattr(response, "content", None)
+                        stripped = content.strip() if isinstance(content, str) else ""
+
+                        if not self._is_valid_agent_response(response, stripped, user_name, user_input_lower,
+                                                             stripped_user_message, responding_agents):
+                            continue
+
+                        responding_agents.add(response.source)
+
+                        # One timestamp shared by the history entry and the yielded message
+                        ts = datetime.now().isoformat()
+
+                        # Add to conversation history
+                        self._append_history({
+                            "speaker": response.source,
+                            "message": response.content,
+                            "timestamp": ts,
+                            "type": "agent"
+                        })
+
+                        # Get agent details
+                        agent_template = self.get_agent_template_by_name(response.source)
+                        display_name = self.agent_name_mapping.get(response.source, response.source)
+
+                        response_data = {
+                            "type": "agent_message",
+                            "agent_name": display_name,
+                            "message": response.content,
+                            "agent_gender": agent_template.gender if agent_template else "female",
+                            "voice_id": agent_template.voice_id if agent_template else "EXAVITQu4vr4xnSDxMaL",
+                            "timestamp": ts,
+                            # Natural delay between responses is applied by the client, not here
+                            "display_after_ms": ENVIRONMENT_RESPONSE_DELAY_MS
+                        }
+
+
+                        logger.debug("Queueing response from %s: %.50s...", display_name, response.content)
+                        await queue.put((response.source, response_data))
+                finally:
+                    # Finishes the run even if the turn is cancelled midway, then hands the team back
+                    await stream.aclose()
+                    self.agent_pool.release(team)
+        finally:
+            # The queue outsizes the response budget, so this never blocks
+            queue.put_nowait(None)
+
+    def close(self):
+        """Free the session's history and caches (agents belong to the shared pool)"""
+        self.conversation_history.clear()
+        self._response_cache.clear()
+        self._semantic_cache.clear()
+        self.rolling_summary = None
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+            self._summary_task = None
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert session to dictionary for API responses"""
-        agent_info = []
-        templates = ConversationTemplates.get_environment_mode(self.environment_type)
-
-        for template in templates:
-            agent_info.append({
+        # Reuse the templates stored in setup_agents instead of resolving them again
+        agent_info = [
+            {
                 "name": template.name,
                 "persona": template.persona,
                 "gender": template.gender,
                 "voice_id": template.voice_id
-            })
+            }
+            for template in self.agent_templates
+        ]
 
         return {
             "session_id": self.session_id,
@@ -248,7 +528,7 @@ Respond naturally and conversationally. Reference previous topics when relevant.
             "environment_type": self.environment_type,
             "agents": agent_info,
             "background_audio_enabled": True,
-            "conversation_history": len(self.conversation_history),
+            "conversation_history": self.total_messages,
             "conversation_turns": self.conversation_turns
         }
 
@@ -257,22 +537,28 @@ class ConversationService:
     """Service for managing conversation mode sessions"""
 
     def __init__(self):
-        self.sessions: Dict[str, ConversationSession] = {}
+        # Bounded by count and idle time; evicted sessions are closed
+        self.sessions = SessionCache(maxsize=1024)
+        # The shared model client is only built once a turn needs agents, so a missing key can't break startup
+        self.agent_pool = AgentPool(functools.partial(_shared_model_client, "gpt-4o-mini", 0.7, 300))
+
+    def build_session(self, session_id: str, environment_type: str = "school") -> ConversationSession:
+        """Build a conversation session without storing it (safe to run in a worker thread)"""
+        return ConversationSession(session_id, self.agent_pool, environment_type)
 
     def create_session(self, session_id: str, environment_type: str = "school") -> ConversationSession:
         """Create a new conversation session"""
-        session = ConversationSession(session_id, environment_type)
-        self.sessions[session_id] = session
+        session = self.build_session(session_id, environment_type)
+        self.sessions.put(session_id, session)
         return session
 
     def get_session(self, session_id: str) -> Optional[ConversationSession]:
-        """Get existing session by ID"""
-        return self.sessions.get(session_id)
+        """Get existing session by ID, restarting its idle timer"""
+        return self.sessions.touch(session_id)
 
     def reset_session(self, session_id: str):
         """Reset or remove a session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.sessions.discard(session_id)
 
     async def get_agent_responses(self, session_id: str, user_message: str, user_name: str = "User") -> AsyncGenerator[Dict[str, Any], None]:
         """Get agent responses for a conversation session"""
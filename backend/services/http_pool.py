@@ -0,0 +1,37 @@
+# services/http_pool.py
+# Process-wide HTTP connection pool and traffic limits for OpenAI requests from every service
+
+import asyncio
+import contextlib
+import functools
+import os
+from typing import AsyncIterator
+import httpx
+from aiolimiter import AsyncLimiter
+
+# Caps on OpenAI traffic shared by both services (they use the same API key): simultaneous
+# requests, and optionally requests per minute (unset or 0 leaves the rate to OpenAI's own limits)
+MAX_CONCURRENT_OPENAI_CALLS = 32
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+
+_openai_semaphore = asyncio.Semaphore(MAX_CONCURRENT_OPENAI_CALLS)
+_rate_limiter = AsyncLimiter(OPENAI_REQUESTS_PER_MINUTE, 60) if OPENAI_REQUESTS_PER_MINUTE > 0 else None
+
+
+@functools.lru_cache(maxsize=1)
+def shared_http_client() -> httpx.AsyncClient:
+    """One HTTP/2 client for all model clients, so concurrent requests multiplex over a few connections"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+
+
+@contextlib.asynccontextmanager
+async def openai_slot(requests: int = 1) -> AsyncIterator[None]:
+    """Hold one concurrency slot for a request (or a sequential run of `requests` requests) within the rate limit"""
+    # Wait for the rate budget before taking a concurrency slot, so waiting callers don't hold one
+    if _rate_limiter is not None:
+        await _rate_limiter.acquire(min(requests, OPENAI_REQUESTS_PER_MINUTE))
+    async with _openai_semaphore:
+        yield
@@ -0,0 +1,92 @@
+# services/session_cache.py
+# Bounded, idle-expiring session storage shared by the conversation services
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Optional
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Sessions kept per service, idle lifetime and how often expired ones are swept
+SESSION_CACHE_MAXSIZE = 1000
+SESSION_TTL_SECONDS = 3600
+SESSION_SWEEP_INTERVAL_SECONDS = 60
+
+
+def _close_session(session: Any):
+    """Release a session's resources, if it knows how to"""
+    close = getattr(session, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            logger.exception("Error closing session")
+
+
+class SessionCache(TTLCache):
+    """LRU + TTL session store that closes sessions when they are evicted or expire"""
+
+    def __init__(self, maxsize: int = SESSION_CACHE_MAXSIZE, ttl: float = SESSION_TTL_SECONDS,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        # Guards compound operations; callers store sessions on the event loop, because evictions
+        # close sessions and that touches their asyncio tasks
+        self.lock = threading.RLock()
+        # Called with the id of every session that is evicted, expires or is discarded
+        self.on_remove = on_remove
+
+    def _removed(self, key: str, session: Any):
+        """Report a removed session and close it"""
+        if self.on_remove is not None:
+            self.on_remove(key)
+        _close_session(session)
+
+    def popitem(self):
+        """Evict the least recently used session (also used by clear())"""
+        key, session = super().popitem()
+        self._removed(key, session)
+        return key, session
+
+    def expire(self, time: Optional[float] = None):
+        """Drop and close sessions whose idle time ran out"""
+        expired = super().expire(time)
+        for key, session in expired:
+            self._removed(key, session)
+        return expired
+
+    def touch(self, key: str) -> Optional[Any]:
+        """Get a session and restart its idle timer"""
+        with self.lock:
+            session = self.get(key)
+            if session is not None:
+                # Re-inserting refreshes the TTL and the LRU position
+                self[key] = session
+            return session
+
+    def put(self, key: str, session: Any):
+        """Store a session"""
+        with self.lock:
+            self[key] = session
+
+    def discard(self, key: str):
+        """Remove and close a session if present"""
+        with self.lock:
+            session = self.pop(key, None)
+        if session is not None:
+            self._removed(key, session)
+
+    def clear(self):
+        """Remove and close every session"""
+        with self.lock:
+            super().clear()
+
+    async def run_sweeper(self, interval: float = SESSION_SWEEP_INTERVAL_SECONDS):
+        """Periodically evict idle sessions so they don't wait for the next cache write"""
+        while True:
+            await asyncio.sleep(interval)
+            with self.lock:
+                expired = self.expire()
+            if expired:
+                logger.debug("Expired %d idle sessions", len(expired))
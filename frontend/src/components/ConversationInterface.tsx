@@ -30,6 +30,8 @@ export function ConversationInterface({
   const [environmentType, setEnvironmentType] = useState(session.environment_type || 'school');
 
   const ws = useRef<WebSocket | null>(null);
+  // Earliest time the next agent message may be shown (server-requested pacing)
+  const nextDisplayAt = useRef(0);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
@@ -56,8 +58,10 @@ export function ConversationInterface({
     };
 
     ws.current.onmessage = (event) => {
-      const message: WebSocketMessage = JSON.parse(event.data);
-      handleWebSocketMessage(message);
+      // The server may batch several messages into one JSON array frame
+      const payload: WebSocketMessage | WebSocketMessage[] = JSON.parse(event.data);
+      const messages = Array.isArray(payload) ? payload : [payload];
+      messages.forEach(handleWebSocketMessage);
     };
 
     ws.current.onclose = () => {
@@ -76,30 +80,42 @@ export function ConversationInterface({
     return text.replace(/\[(?:happy|excited|sad|angry|nervous|curious|mischievously|whispers|shouts|speaking\s+softly|pause|long\s+pause|rushed|drawn\s+out|laughs|laughs\s+harder|starts\s+laughing|wheezing|sighs|exhales|crying|clears\s+throat|gulps|gasp|snorts|French\s+accent|British\s+accent|American\s+accent|pirate\s+voice|strong\s+Russian\s+accent|awe|dramatic\s+tone|interrupting|overlapping|sarcastic|thoughtful|confident)\]/gi, '');
   };
 
+  const displayAgentMessage = (agentName: string, text: string, message: WebSocketMessage) => {
+    const agentMessage: AgentMessage = {
+      type: 'agent_message',
+      agent_name: agentName,
+      message: filterVoiceTags(text), // Filter voice tags for display
+      agent_gender: message.agent_gender || 'neutral',
+      voice_id: message.voice_id,
+      timestamp: message.timestamp || new Date().toISOString(),
+      audio_url: message.audio_url
+    };
+
+    setMessages(prev => [...prev, agentMessage]);
+    setCurrentSpeaker(agentName);
+
+    // Clear current speaker after a delay
+    setTimeout(() => {
+      setCurrentSpeaker(null);
+    }, 2000);
+
+    // Generate and play TTS audio using original message (with voice tags)
+    generateAndPlayTTS(text, agentName);
+  };
+
   const handleWebSocketMessage = (message: WebSocketMessage) => {
     switch (message.type) {
       case 'agent_message':
         if (message.agent_name && message.message) {
-          const agentMessage: AgentMessage = {
-            type: 'agent_message',
-            agent_name: message.agent_name,
-            message: filterVoiceTags(message.message), // Filter voice tags for display
-            agent_gender: message.agent_gender || 'neutral',
-            voice_id: message.voice_id,
-            timestamp: message.timestamp || new Date().toISOString(),
-            audio_url: message.audio_url
-          };
-
-          setMessages(prev => [...prev, agentMessage]);
-          setCurrentSpeaker(message.agent_name);
-
-          // Clear current speaker after a delay
-          setTimeout(() => {
-            setCurrentSpeaker(null);
-          }, 2000);
-
-          // Generate and play TTS audio using original message (with voice tags)
-          generateAndPlayTTS(message.message, message.agent_name);
+          const agentName = message.agent_name;
+          const text = message.message;
+
+          // The server sends responses as soon as they are ready and asks the client
+          // to keep display_after_ms between consecutive agent messages
+          const now = Date.now();
+          const showAt = Math.max(now, nextDisplayAt.current);
+          nextDisplayAt.current = showAt + (message.display_after_ms ?? 0);
+          setTimeout(() => displayAgentMessage(agentName, text, message), showAt - now);
         }
         break;
 
@@ -124,8 +124,10 @@ export const JuryMode: React.FC = () => {
     };
 
     ws.current.onmessage = (event) => {
-      const message = JSON.parse(event.data);
-      handleWebSocketMessage(message);
+      // The server may batch several messages into one JSON array frame
+      const payload = JSON.parse(event.data);
+      const messages = Array.isArray(payload) ? payload : [payload];
+      messages.forEach(handleWebSocketMessage);
     };
 
     ws.current.onclose = () => {
@@ -50,6 +50,7 @@ export interface WebSocketMessage {
   timestamp?: string;
   audio_url?: string;
   user_name?: string;
+  display_after_ms?: number;  // Pause to keep before the next agent message is shown
 }
 
 export interface ConversationMode {